@@ -3,34 +3,28 @@ from flask import Flask
 from flask_cors import CORS
 from .config import Config
 from .extensions import db, migrate, api, socketio
-from .auth.resources import (LoginResource, UserProfileResource)
-from .clubs.resources import (
-    ClubsListResource,
-    ClubsCreatedResource,
-    ClubResource,
-    ClubJoinResource,
-    ClubLeaveResource,
-    ClubBanResource,
-    ClubMembersResource,
-    ClubBooksResource
-)
-from .messages.resources import MessageResource
 
-def create_app(config_class=Config):
-    app = Flask(__name__)
-    app.config.from_object(config_class)
-
-    # configure cors
-    CORS(
-        app, 
-        resources={r"/*": {"origins": "http://localhost:5173"}}, 
-        supports_credentials=True
+def register_resources(app):
+    """
+    import and register rest resources. imports live here rather than at module
+    level so `import app` (migrations, workers, scripts) stays cheap.
+    """
+    from .auth.resources import (LoginResource, UserProfileResource)
+    from .clubs.resources import (
+        ClubsListResource,
+        ClubsCreatedResource,
+        ClubResource,
+        ClubJoinResource,
+        ClubLeaveResource,
+        ClubBanResource,
+        ClubMembersResource,
+        ClubMembersBulkResource,
+        ClubBooksResource,
+        ClubBooksBulkResource
     )
-
-    # initialize extensions
-    db.init_app(app)
-    migrate.init_app(app, db)
-    socketio.init_app(app, cors_allowed_origins="*")
+    from .messages.resources import MentionsResource, MessageExportJobResource, MessageExportResource, MessageResource
+    from .jobs.resources import JobDownloadResource, JobResource
+    from .feed.resources import FeedResource
 
     # auth resources
     api.add_resource(LoginResource, "/auth/login")
@@ -44,11 +38,80 @@ def create_app(config_class=Config):
     api.add_resource(ClubLeaveResource, "/clubs/<string:unique_id>/leave")
     api.add_resource(ClubBanResource, "/clubs/<string:unique_id>/ban")
     api.add_resource(ClubMembersResource, "/clubs/<string:unique_id>/members")
+    api.add_resource(ClubMembersBulkResource, "/clubs/<string:unique_id>/members/bulk")
 
     # book resources
     api.add_resource(ClubBooksResource, "/clubs/<string:unique_id>/books")
+    api.add_resource(ClubBooksBulkResource, "/clubs/<string:unique_id>/books/bulk")
     api.add_resource(MessageResource, "/books/<int:book_id>/messages")
+    api.add_resource(MessageExportResource, "/books/<int:book_id>/messages/export")
+    api.add_resource(MessageExportJobResource, "/books/<int:book_id>/messages/exports")
+    api.add_resource(MentionsResource, "/mentions")
+
+    # activity feed
+    api.add_resource(FeedResource, "/feed")
+
+    # job resources
+    api.add_resource(JobResource, "/jobs/<int:job_id>")
+    api.add_resource(JobDownloadResource, "/jobs/<int:job_id>/download")
+
+    # metrics resources
+    if app.config["METRICS_ENABLED"]:
+        from .metrics.collectors import init_http_metrics
+        from .metrics.resources import (
+            PoolMetricsResource,
+            PrometheusMetricsResource,
+            RequestMetricsResource
+        )
+        init_http_metrics(app)
+        api.add_resource(PrometheusMetricsResource, "/metrics")
+        api.add_resource(PoolMetricsResource, "/metrics/pool")
+        api.add_resource(RequestMetricsResource, "/metrics/requests")
+
+def create_app(config_class=Config):
+    from .compression import init_compression
+    from .jobs import tasks  # noqa: F401  registers job handlers
+    from .jobs.worker import start_in_process_worker
+    from .messages.commands import messages_cli
+    from .messages.recent import init_recent_messages
+    from .pool import build_engine_options, instrument_engine
+    from .profiling import init_profiling
+    from .replicas import init_replicas
+    from .socket_codec import socket_serializer
+    from .sockets import init_socket_handlers
 
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", build_engine_options(app.config))
+
+    # configure cors
+    CORS(
+        app, 
+        resources={r"/*": {"origins": "http://localhost:5173"}}, 
+        supports_credentials=True
+    )
+
+    # initialize extensions
+    db.init_app(app)
+    with app.app_context():
+        instrument_engine(db.engine)
+        init_profiling(app, db.engine)
+    init_replicas(app, app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+    migrate.init_app(app, db)
+    socketio.init_app(app, cors_allowed_origins="*", serializer=socket_serializer(app))
+    init_socket_handlers(socketio)
+
+    init_compression(app)
+    init_recent_messages(app)
+
+    # rest resources
+    register_resources(app)
     api.init_app(app)
 
+    # cli commands
+    app.cli.add_command(messages_cli)
+
+    if app.config["JOBS_RUN_IN_PROCESS"]:
+        start_in_process_worker(app, socketio)
+
     return app
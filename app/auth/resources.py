@@ -5,8 +5,21 @@ from app.models.user import User
 from functools import wraps
 import jwt
 from datetime import datetime, timezone, timedelta
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+
+_google_request = None
+
+def verify_google_credential(credential: str, client_id: str) -> dict:
+    """
+    verify a google oauth id token and return its claims.
+    google.auth (and requests) are imported on first login rather than at app
+    import, and the transport session is reused so certs and connections stay warm.
+    """
+    global _google_request
+    from google.oauth2 import id_token
+    if _google_request is None:
+        from google.auth.transport import requests as google_requests
+        _google_request = google_requests.Request()
+    return id_token.verify_oauth2_token(credential, _google_request, client_id)
 
 def jwt_required(f):
     @wraps(f)
@@ -38,9 +51,8 @@ class LoginResource(Resource):
 
         try:
             # verify google oauth token
-            idinfo = id_token.verify_oauth2_token(
+            idinfo = verify_google_credential(
                 args["credential"],
-                google_requests.Request(),
                 current_app.config["GOOGLE_CLIENT_ID"]
             )
 
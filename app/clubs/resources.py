@@ -1,13 +1,20 @@
 # app/clubs/resources.py
+from datetime import datetime, timezone
 from flask_restful import Resource, reqparse
-from flask import g
+from flask import current_app, g
 from functools import wraps
 from app.extensions import db
 from app.auth.resources import jwt_required
+from app.replicas import read_replica
+from app import hot_queries
+from app.http_cache import cache_headers, make_etag, not_modified
 from app.models.user import User
 from app.models.club import Club
 from app.models.club_membership import ClubMembership
 from app.models.book import Book
+from app.models.versioning import touch_clubs
+from app.jobs.queue import enqueue
+from app.sockets import evict_members
 
 def get_club(f):
     """ 
@@ -17,19 +24,40 @@ def get_club(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         uid = kwargs.get("unique_id")
-        club = Club.query.filter_by(unique_id=uid).first()
+        club = hot_queries.club_by_unique_id(uid)
         if not club:
             return {"error": "Club not found"}, 404
         g.club = club
         return f(*args, **kwargs)
     return decorated
 
+def club_etag(club: Club) -> str:
+    """ etag for per-club responses; clubs.updated_at covers books, members and usernames """
+    return make_etag(club.id, club.updated_at)
+
 class ClubsListResource(Resource):
+    @read_replica
     @jwt_required
     def get(self):
         """
         list all clubs the current user is a member of (and not banned)
         """
+        # one aggregate query stamps the list: any join/leave/ban changes the count or
+        # newest joined_at, and any change to a listed club moves max(updated_at)
+        stamp = db.session.execute(
+            db.select(
+                db.func.count(),
+                db.func.max(Club.updated_at),
+                db.func.max(ClubMembership.joined_at)
+            )
+            .select_from(ClubMembership)
+            .join(Club, Club.id == ClubMembership.club_id)
+            .where(ClubMembership.user_id == g.user_id, ClubMembership.is_banned.is_(False))
+        ).one()
+        etag = make_etag(g.user_id, *stamp)
+        cached = not_modified(etag)
+        if cached is not None: return cached
+
         memberships = ClubMembership.query.filter_by(user_id=g.user_id, is_banned=False).all()
         club_ids = [m.club_id for m in memberships]
         clubs = Club.query.filter(Club.id.in_(club_ids)).all()
@@ -39,7 +67,7 @@ class ClubsListResource(Resource):
             "creator_id": club.creator_id,
             "name": club.name,
             "created_at": club.created_at.isoformat()
-        } for club in clubs], 200
+        } for club in clubs], 200, cache_headers(etag)
 
     @jwt_required
     def post(self):
@@ -66,6 +94,7 @@ class ClubsListResource(Resource):
         }, 201
 
 class ClubResource(Resource):
+    @read_replica
     @jwt_required
     @get_club
     def get(self, unique_id: str):
@@ -73,14 +102,15 @@ class ClubResource(Resource):
         get details about a single club if the user is a member and not banned
         """
         # check membership
-        membership = ClubMembership.query.filter_by(
-            club_id=g.club.id, 
-            user_id=g.user_id
-        ).first()
+        membership = hot_queries.membership(g.club.id, g.user_id)
 
         if not membership or membership.is_banned:
             return {"error": "You are not a member of this club or you are banned"}, 403
 
+        etag = club_etag(g.club)
+        cached = not_modified(etag)
+        if cached is not None: return cached
+
         creator = User.query.get(g.club.creator_id)
 
         return {
@@ -88,7 +118,7 @@ class ClubResource(Resource):
             "creator_username": creator.username if creator else None,
             "name": g.club.name,
             "created_at": g.club.created_at.isoformat(),
-        }, 200
+        }, 200, cache_headers(etag)
 
     @jwt_required
     @get_club
@@ -99,10 +129,13 @@ class ClubResource(Resource):
         if g.club.creator_id != g.user_id:
             return {"error": "Only the creator can delete this club"}, 403
 
-        # delete memberships first, then club
+        # drop memberships and hide the club now; books, messages and the club
+        # row are purged by a background job
         ClubMembership.query.filter_by(club_id=g.club.id).delete()
-        db.session.delete(g.club)
+        g.club.deleted_at = datetime.now(timezone.utc)
+        enqueue("purge_club", {"club_id": g.club.id}, idempotency_key=f"purge_club:{g.club.id}")
         db.session.commit()
+        evict_members(g.club.id, reason="club_deleted")
 
         return {"message": "Club deleted successfully"}, 200
 
@@ -114,10 +147,7 @@ class ClubJoinResource(Resource):
         join a user to a club if they are not banned or already in it
         """
         # check for existing membership
-        membership = ClubMembership.query.filter_by(
-            club_id=g.club.id,
-            user_id=g.user_id
-        ).first()
+        membership = hot_queries.membership(g.club.id, g.user_id)
 
         if membership:
             if membership.is_banned:
@@ -142,10 +172,7 @@ class ClubLeaveResource(Resource):
         """
         user leaves a club they are in
         """
-        membership = ClubMembership.query.filter_by(
-            club_id=g.club.id,
-            user_id=g.user_id
-        ).first()
+        membership = hot_queries.membership(g.club.id, g.user_id)
 
         if not membership or membership.is_banned:
             return {"error": "You are not an active member of this club"}, 403
@@ -155,6 +182,7 @@ class ClubLeaveResource(Resource):
 
         db.session.delete(membership)
         db.session.commit()
+        evict_members(g.club.id, [g.user_id], reason="left")
 
         return {"message": "You left the club"}, 200
 
@@ -179,10 +207,7 @@ class ClubBanResource(Resource):
         if not target_user: return {"error": "User not found"}, 404
 
         # get membership row
-        membership = ClubMembership.query.filter_by(
-            club_id=g.club.id,
-            user_id=target_user_id
-        ).first()
+        membership = hot_queries.membership(g.club.id, target_user_id)
 
         # if not membership, create one as banned
         if not membership:
@@ -192,10 +217,61 @@ class ClubBanResource(Resource):
             membership.is_banned = True
 
         db.session.commit()
+        evict_members(g.club.id, [target_user_id], reason="banned")
 
         return {"message": f"User {target_user_id} has been banned from club {g.club.unique_id}"}, 200
 
+class ClubMembersBulkResource(Resource):
+    @jwt_required
+    @get_club
+    def post(self, unique_id: str):
+        """
+        ban, unban or kick many users at once (creator-only)
+        request json body: { "action": "ban" | "unban" | "kick", "user_ids": [<int>, ...] }
+        """
+        if g.club.creator_id != g.user_id:
+            return {"error": "Only the club creator can moderate members"}, 403
+
+        parser = reqparse.RequestParser()
+        parser.add_argument("action", type=str, required=True, choices=("ban", "unban", "kick"), help="action must be ban, unban or kick")
+        parser.add_argument("user_ids", type=int, action="append", required=True, help="user_ids must be a list of integers")
+        args = parser.parse_args()
+
+        user_ids = list(dict.fromkeys(args["user_ids"]))
+        if len(user_ids) > current_app.config["BULK_MAX_ITEMS"]:
+            return {"error": f"At most {current_app.config['BULK_MAX_ITEMS']} users per request"}, 400
+
+        # the creator can't be moderated out of their own club
+        targets = [uid for uid in user_ids if uid != g.club.creator_id]
+
+        if args["action"] == "ban":
+            changed = ClubMembership.bulk_ban(g.club.id, targets) if targets else set()
+            done, missed = "banned", "not_found"
+        elif args["action"] == "unban":
+            changed = ClubMembership.bulk_unban(g.club.id, targets) if targets else set()
+            done, missed = "unbanned", "not_banned"
+        else:
+            changed = ClubMembership.bulk_kick(g.club.id, targets) if targets else set()
+            done, missed = "kicked", "not_member"
+
+        if changed:
+            touch_clubs(db.session.connection(), [g.club.id])
+        db.session.commit()
+        if changed and args["action"] != "unban":
+            evict_members(g.club.id, changed, reason="banned" if args["action"] == "ban" else "kicked")
+
+        results = []
+        for uid in user_ids:
+            if uid == g.club.creator_id:
+                status = "skipped_creator"
+            else:
+                status = done if uid in changed else missed
+            results.append({"user_id": uid, "status": status})
+
+        return {"action": args["action"], "changed": len(changed), "results": results}, 200
+
 class ClubMembersResource(Resource):
+    @read_replica
     @jwt_required
     @get_club
     def get(self, unique_id: str):
@@ -203,14 +279,15 @@ class ClubMembersResource(Resource):
         list non banned members of this club
         """
         # check membership validity
-        membership = ClubMembership.query.filter_by(
-            club_id=g.club.id, 
-            user_id=g.user_id
-        ).first()
+        membership = hot_queries.membership(g.club.id, g.user_id)
 
         if not membership or membership.is_banned:
             return {"error": "You are not a member of this club or you are banned"}, 403
 
+        etag = club_etag(g.club)
+        cached = not_modified(etag)
+        if cached is not None: return cached
+
         # fetch memberships 
         memberships = ClubMembership.query.filter_by(
             club_id=g.club.id, 
@@ -230,15 +307,16 @@ class ClubMembersResource(Resource):
         return {
             "creator_id": g.club.creator_id,
             "members": members_data
-        }, 200
+        }, 200, cache_headers(etag)
 
 class ClubsCreatedResource(Resource):
+    @read_replica
     @jwt_required
     def get(self):
         """
         return a list of clubs that the current user created
         """
-        clubs = Club.query.filter_by(creator_id=g.user_id).all()
+        clubs = Club.query.filter_by(creator_id=g.user_id, deleted_at=None).all()
 
         return [{
             "unique_id": club.unique_id,
@@ -278,6 +356,7 @@ class ClubBooksResource(Resource):
         }, 201
 
 
+    @read_replica
     @jwt_required
     @get_club
     def get(self, unique_id: str):
@@ -285,20 +364,66 @@ class ClubBooksResource(Resource):
         list all books in the club
         """
 
-        membership = ClubMembership.query.filter_by(
-            club_id=g.club.id,
-            user_id=g.user_id,
-            is_banned=False
-        ).first()
+        membership = hot_queries.active_membership(g.club.id, g.user_id)
 
         if not membership or membership.is_banned:
             return {"error": "You are not an active member of this club"}, 403
 
-        books = Book.query.filter_by(club_id=g.club.id).order_by(Book.added_at.asc()).all()
+        etag = club_etag(g.club)
+        cached = not_modified(etag)
+        if cached is not None: return cached
+
+        books = Book.query.filter_by(club_id=g.club.id).order_by(Book.added_at.asc(), Book.id.asc()).all()
 
         return [{
             "id": book.id,
             "title": book.title,
             "author": book.author,
             "added_at": book.added_at.isoformat()
-        } for book in books], 200
+        } for book in books], 200, cache_headers(etag)
+
+class ClubBooksBulkResource(Resource):
+    @jwt_required
+    @get_club
+    def post(self, unique_id: str):
+        """
+        add many books to the club in one insert (creator-only)
+        request json body: { "books": [{ "title": <str>, "author": <str> }, ...] }
+        invalid items are reported per index and the rest are still added
+        """
+        if g.club.creator_id != g.user_id:
+            return {"error": "Only the creator can add books to this club"}, 403
+
+        parser = reqparse.RequestParser()
+        parser.add_argument("books", type=dict, action="append", required=True, help="books must be a list of objects")
+        args = parser.parse_args()
+
+        if len(args["books"]) > current_app.config["BULK_MAX_ITEMS"]:
+            return {"error": f"At most {current_app.config['BULK_MAX_ITEMS']} books per request"}, 400
+
+        results = [None] * len(args["books"])
+        valid = []
+        for i, item in enumerate(args["books"]):
+            title, author = item.get("title"), item.get("author")
+            if not isinstance(title, str) or not isinstance(author, str) or not title or not author:
+                results[i] = {"index": i, "status": "invalid", "error": "title and author are required"}
+            elif len(title) > 255 or len(author) > 255:
+                results[i] = {"index": i, "status": "invalid", "error": "title and author must be at most 255 characters"}
+            else:
+                valid.append((i, {"title": title, "author": author}))
+
+        if valid:
+            rows = Book.bulk_create(g.club.id, [book for _, book in valid])
+            for (i, _), row in zip(valid, rows):
+                results[i] = {
+                    "index": i,
+                    "status": "created",
+                    "id": row.id,
+                    "title": row.title,
+                    "author": row.author,
+                    "added_at": row.added_at.isoformat()
+                }
+            touch_clubs(db.session.connection(), [g.club.id])
+            db.session.commit()
+
+        return {"created": len(valid), "results": results}, 201 if valid else 400
@@ -0,0 +1,84 @@
+# app/compression.py
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# uncompressed bytes fed to a streaming compressor between flushes. each flush
+# ends a deflate block, so flushing per small chunk costs ratio and cpu.
+STREAM_FLUSH_BYTES = 32 * 1024
+
+def choose_encoding() -> str:
+    """ best content-coding the client accepts: br (if available), gzip, or None """
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+def _compressible(response, min_bytes: int) -> bool:
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    if not (response.mimetype or "").startswith(COMPRESSIBLE_TYPES):
+        return False
+    return response.content_length is not None and response.content_length >= min_bytes
+
+def compress_body(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def stream_compressed(chunks, encoding: str, level: int = 6, flush_bytes: int = STREAM_FLUSH_BYTES):
+    """
+    compress an iterable of bytes/str chunks incrementally for a streamed response,
+    flushing every `flush_bytes` of input so clients can start decoding early
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=min(level, 11))
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        # wbits 16+ gives a gzip container instead of raw zlib
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    pending = 0
+    for chunk in chunks:
+        chunk = chunk.encode() if isinstance(chunk, str) else chunk
+        data = process(chunk)
+        pending += len(chunk)
+        if pending >= flush_bytes:
+            data += flush()
+            pending = 0
+        if data:
+            yield data
+    yield finish()
+
+def init_compression(app) -> None:
+    """ compress json responses above COMPRESS_MIN_BYTES for clients that accept it """
+    if not app.config["COMPRESS_ENABLED"]:
+        return
+    min_bytes = app.config["COMPRESS_MIN_BYTES"]
+    level = app.config["COMPRESS_LEVEL"]
+
+    @app.after_request
+    def compress_response(response):
+        response.vary.add("Accept-Encoding")
+        if not _compressible(response, min_bytes):
+            return response
+
+        encoding = choose_encoding()
+        if encoding is None:
+            return response
+
+        response.set_data(compress_body(response.get_data(), encoding, level))
+        response.headers["Content-Encoding"] = encoding
+        return response
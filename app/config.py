@@ -4,12 +4,79 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def env_flag(name: str, default: bool = False) -> bool:
+    """ read a boolean env var ("1", "true", "yes", "on" are truthy) """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'postgresql://localhost/bindery'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # comma separated read replica urls; GET handlers marked @read_replica use them
+    SQLALCHEMY_REPLICA_URIS = [
+        uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()
+    ]
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+    REPLICA_CHECK_INTERVAL_SECONDS = float(os.environ.get('REPLICA_CHECK_INTERVAL_SECONDS', 10))
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
     GOOGLE_DISCOVERY_URL = 'https://accounts.google.com/.well-known/openid-configuration'
 
+    # connection pool (see app/pool.py)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = env_flag('DB_POOL_PRE_PING', True)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
+    DB_PGBOUNCER = env_flag('DB_PGBOUNCER')
+    # psycopg 3 only: server-side prepare after this many executions per connection
+    DB_PREPARE_THRESHOLD = int(os.environ.get('DB_PREPARE_THRESHOLD', 5))
+
+    # metrics
+    METRICS_ENABLED = env_flag('METRICS_ENABLED', True)
+
+    # request / query profiling (see app/profiling.py)
+    PROFILING_ENABLED = env_flag('PROFILING_ENABLED')
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+    PROFILE_HEADER = 'X-Profile'
+    PROFILE_DUMPS_ENABLED = env_flag('PROFILE_DUMPS_ENABLED')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or 'profiles'
+
+    # message history
+    MESSAGE_PAGE_MAX = int(os.environ.get('MESSAGE_PAGE_MAX', 200))
+    MESSAGE_ARCHIVE_DIR = os.environ.get('MESSAGE_ARCHIVE_DIR') or 'archive'
+    MESSAGE_ARCHIVE_AFTER_MONTHS = int(os.environ.get('MESSAGE_ARCHIVE_AFTER_MONTHS', 12))
+    # how long a message client_id guards against duplicate posts
+    MESSAGE_CLIENT_ID_TTL_HOURS = int(os.environ.get('MESSAGE_CLIENT_ID_TTL_HOURS', 48))
+    # per-process buffer of each book's newest messages (see app/messages/recent.py); 0 disables
+    RECENT_MESSAGES_PER_BOOK = int(os.environ.get('RECENT_MESSAGES_PER_BOOK', 200))
+    RECENT_MESSAGES_MAX_BYTES = int(os.environ.get('RECENT_MESSAGES_MAX_BYTES', 64 * 1024 * 1024))
+
+    # response compression (see app/compression.py)
+    COMPRESS_ENABLED = env_flag('COMPRESS_ENABLED', True)
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+
+    # socket.io wire format for every client: "default" (json) or "msgpack"
+    SOCKETIO_SERIALIZER = os.environ.get('SOCKETIO_SERIALIZER') or 'default'
+
+    # activity feed (see app/feed/timeline.py): clubs with at most this many
+    # active members fan out to member timelines on write, larger ones merge on read
+    FEED_FANOUT_MAX_MEMBERS = int(os.environ.get('FEED_FANOUT_MAX_MEMBERS', 200))
+
+    # bulk endpoints
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 500))
+
+    # background jobs (see app/jobs)
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1))
+    JOB_LOCK_TIMEOUT = float(os.environ.get('JOB_LOCK_TIMEOUT', 300))
+    JOB_BACKOFF_BASE = float(os.environ.get('JOB_BACKOFF_BASE', 2))
+    JOB_BACKOFF_CAP = float(os.environ.get('JOB_BACKOFF_CAP', 300))
+    JOBS_RUN_IN_PROCESS = env_flag('JOBS_RUN_IN_PROCESS')
+    EXPORT_DIR = os.environ.get('EXPORT_DIR') or 'exports'
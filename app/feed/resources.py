@@ -0,0 +1,26 @@
+# app/feed/resources.py
+from flask_restful import Resource, reqparse
+from flask import current_app, g
+from app.auth.resources import jwt_required
+from app.replicas import read_replica
+from app.feed.timeline import read_feed
+
+FEED_PAGE_SIZE = 50
+
+class FeedResource(Resource):
+    @read_replica
+    @jwt_required
+    def get(self):
+        """
+        newest messages across every club the user is an active member of,
+        newest first. page with ?limit=<n>&before=<message id>
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument("limit", type=int, default=FEED_PAGE_SIZE, location="args")
+        parser.add_argument("before", type=int, location="args")
+        args = parser.parse_args()
+
+        if not 1 <= args["limit"] <= current_app.config["MESSAGE_PAGE_MAX"]:
+            return {"error": f"limit must be between 1 and {current_app.config['MESSAGE_PAGE_MAX']}"}, 400
+
+        return read_feed(g.user_id, args["limit"], before=args["before"]), 200
@@ -0,0 +1,160 @@
+# app/feed/timeline.py
+import heapq
+from sqlalchemy import insert, literal, union_all
+from app.extensions import db
+from app.models.book import Book
+from app.models.club import Club
+from app.models.club_membership import ClubMembership
+from app.models.feed_entry import FeedEntry
+from app.models.message import Message
+
+# sqlite caps compound selects at 500 terms; merge-on-read unions this many books per query
+MERGE_BOOKS_PER_QUERY = 100
+
+def _set_fanout_from(club_id: int, message_id) -> None:
+    # a core update: clubs.updated_at (and so the club's etags) stays put
+    db.session.execute(db.update(Club).where(Club.id == club_id).values(feed_fanout_from=message_id))
+
+def fan_out(message, club_id: int, max_members: int) -> int:
+    """
+    copy a just-flushed message into every active member's timeline with one
+    INSERT ... SELECT. clubs with more than `max_members` active members are
+    skipped; their messages are merged at read time. clubs.feed_fanout_from
+    records where the club's timeline starts, so readers merge the messages
+    before it. the caller commits. returns rows written.
+    """
+    active = (ClubMembership.club_id == club_id) & (ClubMembership.is_banned == False)
+    size = db.select(db.func.count()).select_from(ClubMembership).where(active).scalar_subquery()
+    state = db.select(Club.feed_fanout_from, size.label("members")).where(Club.id == club_id)
+
+    club = db.session.execute(state).one()
+    if (club.members <= max_members) != (club.feed_fanout_from is not None):
+        # the club crossed the threshold. the row lock waits out posts still
+        # deciding under the shared lock below and holds back new ones
+        club = db.session.execute(state.with_for_update(of=Club)).one()
+        small = club.members <= max_members
+        if small and club.feed_fanout_from is None:
+            newest = db.session.execute(
+                db.select(db.func.max(Message.id))
+                .join(Book, Book.id == Message.book_id)
+                .where(Book.club_id == club_id, Message.id != message.id)
+            ).scalar()
+            _set_fanout_from(club_id, (newest or 0) + 1)
+        elif not small and club.feed_fanout_from is not None:
+            _set_fanout_from(club_id, None)
+    else:
+        club = db.session.execute(state.with_for_update(of=Club, read=True)).one()
+        # a timeline may have started since the first read: every message from
+        # feed_fanout_from on has to be in it, so fan out until a post ends it
+        small = club.feed_fanout_from is not None or club.members <= max_members
+
+    if not small:
+        return 0
+    members = db.select(
+        ClubMembership.user_id,
+        literal(message.id),
+        literal(message.book_id),
+        literal(club_id),
+        literal(message.created_at, db.DateTime)
+    ).where(active)
+
+    return db.session.execute(
+        insert(FeedEntry).from_select(
+            ["user_id", "message_id", "book_id", "club_id", "created_at"], members
+        )
+    ).rowcount
+
+def member_clubs(user_id: int) -> list:
+    """ (id, unique_id, feed_fanout_from) for each live club the user is active in """
+    return db.session.execute(
+        db.select(Club.id, Club.unique_id, Club.feed_fanout_from)
+        .join(ClubMembership, (ClubMembership.club_id == Club.id)
+              & (ClubMembership.user_id == user_id)
+              & (ClubMembership.is_banned == False))
+        .where(Club.deleted_at.is_(None))
+    ).all()
+
+def _columns(club_id):
+    return (Message.id, Message.book_id, club_id.label("club_id"), Message.user_id, Message.content, Message.created_at)
+
+def _timeline(user_id: int, fanout_from: dict, limit: int, before: int = None) -> list:
+    """
+    newest fanned-out messages, descending by id, from clubs mapped to the
+    id their timeline starts at
+    """
+    starts = db.or_(*(
+        (FeedEntry.club_id == club_id) & (FeedEntry.message_id >= start)
+        for club_id, start in fanout_from.items()
+    ))
+    query = db.select(*_columns(FeedEntry.club_id)) \
+        .select_from(FeedEntry) \
+        .join(Message, (Message.id == FeedEntry.message_id) & (Message.created_at == FeedEntry.created_at)) \
+        .where(FeedEntry.user_id == user_id, starts)
+    if before is not None:
+        query = query.where(FeedEntry.message_id < before)
+    return db.session.execute(query.order_by(FeedEntry.message_id.desc()).limit(limit)).all()
+
+def _book_cursors(fanout_from: dict, limit: int, before: int = None) -> list:
+    """
+    for each book of the given clubs, its newest `limit` messages older than
+    `before` and than the id the club's timeline starts at, if any (a keyset
+    read on (book_id, id)), descending. books are unioned into a few round
+    trips rather than one query each.
+    """
+    books = db.session.execute(
+        db.select(Book.id, Book.club_id).where(Book.club_id.in_(fanout_from))
+    ).all()
+
+    per_book = {book.id: [] for book in books}
+    for i in range(0, len(books), MERGE_BOOKS_PER_QUERY):
+        selects = []
+        for book in books[i:i + MERGE_BOOKS_PER_QUERY]:
+            query = db.select(*_columns(literal(book.club_id))).where(Message.book_id == book.id)
+            bounds = [b for b in (before, fanout_from[book.club_id]) if b is not None]
+            if bounds:
+                query = query.where(Message.id < min(bounds))
+            page = query.order_by(Message.id.desc()).limit(limit).subquery()
+            selects.append(db.select(page))
+        for row in db.session.execute(union_all(*selects)):
+            per_book[row.book_id].append(row)
+
+    return [sorted(rows, key=lambda row: row.id, reverse=True) for rows in per_book.values() if rows]
+
+def read_feed(user_id: int, limit: int, before: int = None) -> list:
+    """
+    newest messages across all of the user's clubs, descending by id, older
+    than `before` when given. a club's messages from its feed_fanout_from on
+    are read from the precomputed timeline; older ones, and all of a club's
+    while it has none, k-way merge per-book cursors. message ids are global,
+    so one id cursor pages both.
+    """
+    clubs = member_clubs(user_id)
+    unique_ids = {club.id: club.unique_id for club in clubs}
+    fanned = {club.id: club.feed_fanout_from for club in clubs if club.feed_fanout_from is not None}
+
+    timeline = _timeline(user_id, fanned, limit, before) if fanned else []
+    # a full timeline page ends at `floor`; clubs whose timeline starts at or
+    # below it have nothing older to merge into this page
+    floor = timeline[-1].id if len(timeline) == limit else None
+    merged = {
+        club.id: club.feed_fanout_from for club in clubs
+        if club.feed_fanout_from is None or floor is None or club.feed_fanout_from > floor
+    }
+
+    sources = [timeline]
+    if merged:
+        sources.extend(_book_cursors(merged, limit, before))
+
+    feed = []
+    for row in heapq.merge(*sources, key=lambda row: row.id, reverse=True):
+        feed.append({
+            "id": row.id,
+            "club_id": unique_ids[row.club_id],
+            "book_id": row.book_id,
+            "user_id": row.user_id,
+            "content": row.content,
+            "created_at": row.created_at.isoformat()
+        })
+        if len(feed) == limit:
+            break
+    return feed
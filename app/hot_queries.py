@@ -0,0 +1,41 @@
+# app/hot_queries.py
+"""
+lookups that run on nearly every request, as statements built once at import.
+
+a reused select() memoizes its cache key, so executing one skips query
+construction and goes straight to the engine's compiled-sql cache. on
+psycopg 3 the identical sql text is also prepared server-side after
+DB_PREPARE_THRESHOLD executions per connection (see app/pool.py).
+`python -m benchmarks.lookups` compares these with the Query API.
+"""
+from sqlalchemy import bindparam, select
+from app.extensions import db
+from app.models.book import Book
+from app.models.club import Club
+from app.models.club_membership import ClubMembership
+
+CLUB_BY_UNIQUE_ID = select(Club).where(
+    Club.unique_id == bindparam("unique_id"),
+    Club.deleted_at.is_(None)
+)
+MEMBERSHIP = select(ClubMembership).where(
+    ClubMembership.club_id == bindparam("club_id"),
+    ClubMembership.user_id == bindparam("user_id")
+)
+ACTIVE_MEMBERSHIP = MEMBERSHIP.where(ClubMembership.is_banned == False)
+BOOK_BY_ID = select(Book).where(Book.id == bindparam("book_id"))
+
+def club_by_unique_id(unique_id: str):
+    """ live (not soft-deleted) club by its public id, or None """
+    return db.session.execute(CLUB_BY_UNIQUE_ID, {"unique_id": unique_id}).scalar()
+
+def membership(club_id: int, user_id: int):
+    """ the user's membership row in a club, banned or not, or None """
+    return db.session.execute(MEMBERSHIP, {"club_id": club_id, "user_id": user_id}).scalar()
+
+def active_membership(club_id: int, user_id: int):
+    """ the user's membership if they are in the club and not banned, else None """
+    return db.session.execute(ACTIVE_MEMBERSHIP, {"club_id": club_id, "user_id": user_id}).scalar()
+
+def book_by_id(book_id: int):
+    return db.session.execute(BOOK_BY_ID, {"book_id": book_id}).scalar()
@@ -0,0 +1,24 @@
+# app/http_cache.py
+import hashlib
+from flask import Response, request
+
+def make_etag(*parts) -> str:
+    """ opaque etag value from cheap version stamps (ids, counts, updated_at) """
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+def cache_headers(etag: str) -> dict:
+    """
+    responses are per-user (Authorization) and must be revalidated on every use,
+    which is a one-query 304 when nothing changed
+    """
+    return {
+        "ETag": f'W/"{etag}"',
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+
+def not_modified(etag: str):
+    """ a 304 response if the request's If-None-Match matches `etag`, else None """
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=cache_headers(etag))
+    return None
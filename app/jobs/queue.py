@@ -0,0 +1,137 @@
+# app/jobs/queue.py
+import random
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.extensions import db
+from app.models.job import Job
+
+# job name -> handler(payload: dict) -> json-serializable result
+HANDLERS = {}
+
+def job(name: str):
+    """ register a function as the handler for jobs called `name` """
+    def register(f):
+        HANDLERS[name] = f
+        return f
+    return register
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def enqueue(name: str, payload: dict, idempotency_key: str = None, max_attempts: int = 5, delay: float = 0) -> Job:
+    """
+    add a job in the caller's transaction, so it is only visible to workers
+    once the surrounding change commits. with an idempotency key, enqueueing
+    the same work twice returns the existing job instead of a duplicate; a
+    job that already failed for good is requeued with fresh attempts.
+    the caller commits.
+    """
+    if name not in HANDLERS:
+        raise ValueError(f"unknown job: {name}")
+    run_at = utcnow() + timedelta(seconds=delay)
+
+    if idempotency_key is None:
+        new_job = Job(name=name, payload=payload, max_attempts=max_attempts, run_at=run_at)
+        db.session.add(new_job)
+        db.session.flush()
+        return new_job
+
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(Job).values(
+        name=name,
+        payload=payload,
+        idempotency_key=idempotency_key,
+        status=Job.QUEUED,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=run_at
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Job.idempotency_key],
+        set_={
+            "payload": stmt.excluded.payload,
+            "status": Job.QUEUED,
+            "attempts": 0,
+            "max_attempts": stmt.excluded.max_attempts,
+            "run_at": stmt.excluded.run_at,
+            "finished_at": None,
+            "last_error": None,
+            "locked_at": None,
+            "locked_by": None,
+        },
+        where=Job.status == Job.FAILED
+    )
+    db.session.execute(stmt)
+    # the session may already hold the job as it was before the requeue
+    return Job.query.filter_by(idempotency_key=idempotency_key).populate_existing().one()
+
+def claim(worker_id: str, lock_timeout: float):
+    """
+    lock the next due job for this worker and mark it running, or return None.
+    running jobs whose lock is older than `lock_timeout` (a crashed worker) are
+    claimable again, unless that was their last attempt: those are marked
+    failed. postgres uses FOR UPDATE SKIP LOCKED so workers never wait on each
+    other; elsewhere a conditional update decides the race.
+    """
+    now = utcnow()
+    stale = now - timedelta(seconds=lock_timeout)
+    lost = (Job.status == Job.RUNNING) & (Job.locked_at < stale)
+
+    expired = db.session.execute(
+        update(Job)
+        .where(lost, Job.attempts >= Job.max_attempts)
+        .values(status=Job.FAILED, finished_at=now, locked_at=None, locked_by=None,
+                last_error="lock expired on the last attempt; the worker running it was lost")
+    ).rowcount
+    if expired:
+        db.session.commit()
+    due = or_(
+        (Job.status == Job.QUEUED) & (Job.run_at <= now),
+        lost & (Job.attempts < Job.max_attempts)
+    )
+
+    candidate = select(Job.id).where(due).order_by(Job.run_at, Job.id).limit(1)
+    if db.session.get_bind().dialect.name == "postgresql":
+        candidate = candidate.with_for_update(skip_locked=True)
+
+    job_id = db.session.execute(candidate).scalar()
+    if job_id is None:
+        db.session.rollback()
+        return None
+
+    claimed = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, due)
+        .values(status=Job.RUNNING, locked_at=now, locked_by=worker_id, attempts=Job.attempts + 1)
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return None
+    return db.session.get(Job, job_id)
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    """ exponential backoff with full jitter """
+    return random.uniform(0, min(cap, base * 2 ** (attempts - 1)))
+
+def complete(claimed: Job, result=None) -> None:
+    claimed.status = Job.DONE
+    claimed.result = result
+    claimed.finished_at = utcnow()
+    claimed.locked_at = None
+    claimed.locked_by = None
+    db.session.commit()
+
+def fail(claimed: Job, error: str, backoff_base: float, backoff_cap: float) -> None:
+    """ schedule a retry with backoff, or mark the job failed after max_attempts """
+    claimed.last_error = error
+    claimed.locked_at = None
+    claimed.locked_by = None
+    if claimed.attempts >= claimed.max_attempts:
+        claimed.status = Job.FAILED
+        claimed.finished_at = utcnow()
+    else:
+        claimed.status = Job.QUEUED
+        claimed.run_at = utcnow() + timedelta(seconds=backoff_seconds(claimed.attempts, backoff_base, backoff_cap))
+    db.session.commit()
@@ -0,0 +1,49 @@
+# app/jobs/resources.py
+import os
+from flask_restful import Resource
+from flask import g, send_file
+from app.auth.resources import jwt_required
+from app.extensions import db
+from app.models.job import Job
+
+def get_own_job(job_id: int):
+    """ the job if the current user requested it, else None """
+    job = db.session.get(Job, job_id)
+    if not job or job.payload.get("requested_by") != g.user_id:
+        return None
+    return job
+
+class JobResource(Resource):
+    @jwt_required
+    def get(self, job_id: int):
+        """
+        status of a job the current user requested
+        """
+        job = get_own_job(job_id)
+        if not job: return {"error": "Job not found"}, 404
+
+        return {
+            "id": job.id,
+            "name": job.name,
+            "status": job.status,
+            "attempts": job.attempts,
+            "created_at": job.created_at.isoformat(),
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "result": {k: v for k, v in (job.result or {}).items() if k != "path"},
+        }, 200
+
+class JobDownloadResource(Resource):
+    @jwt_required
+    def get(self, job_id: int):
+        """
+        download the file produced by a finished export job
+        """
+        job = get_own_job(job_id)
+        if not job: return {"error": "Job not found"}, 404
+        if job.status != Job.DONE or not (job.result or {}).get("path"):
+            return {"error": "Job has no file yet", "status": job.status}, 409
+
+        path = job.result["path"]
+        if not os.path.exists(path):
+            return {"error": "Export file is no longer available"}, 410
+        return send_file(os.path.abspath(path), mimetype="application/gzip", as_attachment=True)
@@ -0,0 +1,81 @@
+# app/jobs/tasks.py
+import gzip
+import json
+import os
+from flask import current_app
+from app.extensions import db
+from app.jobs.queue import job
+from app.models.book import Book
+from app.models.club import Club
+from app.models.club_membership import ClubMembership
+from app.models.feed_entry import FeedEntry
+from app.models.message import Message
+from app.models.message_mention import MessageMention
+from app.models.message_client_id import MessageClientId
+
+PURGE_BATCH_SIZE = 5000
+
+@job("purge_club")
+def purge_club(payload: dict) -> dict:
+    """
+    delete a soft-deleted club's messages (with their mentions, client ids and
+    feed entries), books, memberships and row. messages go in committed batches so a
+    large club never holds one long transaction; safe to rerun after a crash.
+    """
+    club_id = payload["club_id"]
+    club = db.session.get(Club, club_id)
+    if club is None:
+        return {"club_id": club_id, "messages": 0, "already_purged": True}
+
+    book_ids = db.select(Book.id).where(Book.club_id == club_id).scalar_subquery()
+    deleted_messages = 0
+    while True:
+        batch = db.session.execute(
+            db.select(Message.id).where(Message.book_id.in_(book_ids)).limit(PURGE_BATCH_SIZE)
+        ).scalars().all()
+        if not batch:
+            break
+        db.session.execute(db.delete(MessageMention).where(MessageMention.message_id.in_(batch)))
+        db.session.execute(db.delete(MessageClientId).where(MessageClientId.message_id.in_(batch)))
+        db.session.execute(db.delete(FeedEntry).where(FeedEntry.club_id == club_id, FeedEntry.message_id.in_(batch)))
+        db.session.execute(db.delete(Message).where(Message.id.in_(batch)))
+        db.session.commit()
+        deleted_messages += len(batch)
+
+    # rows whose message is no longer in `messages`, e.g. archived before
+    # archive_month dropped them; they still reference the books
+    db.session.execute(db.delete(FeedEntry).where(FeedEntry.club_id == club_id))
+    db.session.execute(db.delete(MessageMention).where(MessageMention.book_id.in_(book_ids)))
+    db.session.execute(db.delete(MessageClientId).where(MessageClientId.book_id.in_(book_ids)))
+    db.session.execute(db.delete(Book).where(Book.club_id == club_id))
+    db.session.execute(db.delete(ClubMembership).where(ClubMembership.club_id == club_id))
+    db.session.execute(db.delete(Club).where(Club.id == club_id))
+    db.session.commit()
+    return {"club_id": club_id, "messages": deleted_messages}
+
+@job("export_book_messages")
+def export_book_messages(payload: dict) -> dict:
+    """ write a book's message history to a gzipped ndjson file in EXPORT_DIR """
+    book_id = payload["book_id"]
+    export_dir = current_app.config["EXPORT_DIR"]
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"book_{book_id}_{payload['requested_by']}_{payload['up_to_id']}.ndjson.gz")
+
+    query = db.select(Message.id, Message.user_id, Message.content, Message.created_at) \
+        .where(Message.book_id == book_id, Message.id <= payload["up_to_id"]) \
+        .order_by(Message.id.asc()) \
+        .execution_options(yield_per=1000)
+
+    rows = 0
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for row in db.session.execute(query):
+            f.write(json.dumps({
+                "id": row.id,
+                "user_id": row.user_id,
+                "content": row.content,
+                "created_at": row.created_at.isoformat()
+            }) + "\n")
+            rows += 1
+    os.replace(tmp_path, path)
+    return {"path": path, "rows": rows}
@@ -0,0 +1,71 @@
+# app/jobs/worker.py
+import logging
+import os
+import socket
+import time
+import traceback
+from app.extensions import db
+from app.jobs import queue
+
+logger = logging.getLogger("bindery.jobs")
+
+class Worker:
+    """
+    polls the jobs table and runs handlers. run several processes (or the
+    in-process background task) against one database; claims never overlap.
+    """
+
+    def __init__(self, app, worker_id: str = None) -> None:
+        self.app = app
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = app.config["JOB_POLL_INTERVAL"]
+        self.lock_timeout = app.config["JOB_LOCK_TIMEOUT"]
+        self.backoff_base = app.config["JOB_BACKOFF_BASE"]
+        self.backoff_cap = app.config["JOB_BACKOFF_CAP"]
+        self._stopping = False
+
+    def run_once(self) -> bool:
+        """ claim and run at most one job; returns False if the queue was empty """
+        with self.app.app_context():
+            claimed = queue.claim(self.worker_id, self.lock_timeout)
+            if claimed is None:
+                return False
+
+            handler = queue.HANDLERS.get(claimed.name)
+            started = time.perf_counter()
+            try:
+                if handler is None:
+                    raise LookupError(f"no handler registered for {claimed.name}")
+                result = handler(claimed.payload)
+            except Exception:
+                db.session.rollback()
+                error = traceback.format_exc(limit=5)
+                logger.warning("job %s (%s) attempt %d failed:\n%s", claimed.id, claimed.name, claimed.attempts, error)
+                queue.fail(claimed, error, self.backoff_base, self.backoff_cap)
+            else:
+                queue.complete(claimed, result)
+                logger.info("job %s (%s) done in %.1fms", claimed.id, claimed.name, (time.perf_counter() - started) * 1000)
+            finally:
+                db.session.remove()
+            return True
+
+    def run(self, sleep=time.sleep) -> None:
+        """ work until stop() is called; sleeps only when the queue is empty """
+        logger.info("worker %s started", self.worker_id)
+        while not self._stopping:
+            try:
+                if not self.run_once():
+                    sleep(self.poll_interval)
+            except Exception:
+                # database hiccups shouldn't kill the worker
+                logger.exception("worker %s poll failed", self.worker_id)
+                sleep(self.poll_interval)
+
+    def stop(self) -> None:
+        self._stopping = True
+
+def start_in_process_worker(app, socketio) -> Worker:
+    """ run a worker as a socketio background task inside the web process """
+    worker = Worker(app, worker_id=f"{socket.gethostname()}:{os.getpid()}:web")
+    socketio.start_background_task(worker.run, socketio.sleep)
+    return worker
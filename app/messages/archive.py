@@ -0,0 +1,109 @@
+# app/messages/archive.py
+import gzip
+import json
+import os
+from datetime import datetime
+from sqlalchemy import or_, select
+from app.extensions import db
+from app.models.message_archive import MessageArchive, MessageArchiveBook
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency; archives fall back to gzipped json lines
+    pa = None
+    pq = None
+
+COLUMNS = ("id", "book_id", "user_id", "content", "created_at")
+
+def archive_extension() -> str:
+    return ".parquet" if pq is not None else ".jsonl.gz"
+
+def write_archive(rows: list, path: str) -> None:
+    """
+    write message rows (dicts with COLUMNS) sorted by (book_id, id), so parquet
+    row group statistics let reads skip other books.
+    """
+    rows = sorted(rows, key=lambda r: (r["book_id"], r["id"]))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+
+    if path.endswith(".parquet"):
+        table = pa.Table.from_pydict({col: [r[col] for r in rows] for col in COLUMNS})
+        pq.write_table(table, tmp_path, compression="zstd", row_group_size=10000)
+    else:
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps({**r, "created_at": r["created_at"].isoformat()}) + "\n")
+
+    # rename last so a crashed job never leaves a half-written archive behind
+    os.replace(tmp_path, path)
+
+def read_archive(path: str, book_id: int, before_id: int = None) -> list:
+    """ rows for one book from an archive file, ascending by id """
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise RuntimeError(f"pyarrow is required to read {path}")
+        filters = [("book_id", "=", book_id)]
+        if before_id is not None:
+            filters.append(("id", "<", before_id))
+        rows = pq.read_table(path, filters=filters).to_pylist()
+    else:
+        rows = []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                r = json.loads(line)
+                if r["book_id"] != book_id or (before_id is not None and r["id"] >= before_id):
+                    continue
+                r["created_at"] = datetime.fromisoformat(r["created_at"])
+                rows.append(r)
+    rows.sort(key=lambda r: r["id"])
+    return rows
+
+def read_archive_ids(path: str) -> list:
+    """ (book_id, id) of every row in an archive file """
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise RuntimeError(f"pyarrow is required to read {path}")
+        return pq.read_table(path, columns=["book_id", "id"]).to_pylist()
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [{"book_id": r["book_id"], "id": r["id"]} for r in map(json.loads, f)]
+
+def index_archive(archive: MessageArchive, rows: list) -> None:
+    """ record which books `rows` (the archive's contents) hold; the caller commits """
+    entries = MessageArchiveBook.rows_for(archive.id, rows)
+    if entries:
+        db.session.execute(db.insert(MessageArchiveBook), entries)
+    archive.books_indexed = True
+
+def candidate_archives(book, before_id: int = None) -> list:
+    """
+    archives that can hold `book`'s messages older than `before_id`, newest first:
+    indexed archives with rows for the book in that range, plus unindexed ones
+    that don't end before the book was added. one indexed query, no file i/o.
+    """
+    holds_book = select(MessageArchiveBook.archive_id).where(MessageArchiveBook.book_id == book.id)
+    if before_id is not None:
+        holds_book = holds_book.where(MessageArchiveBook.min_id < before_id)
+    return db.session.scalars(
+        select(MessageArchive)
+        .where(or_(
+            MessageArchive.id.in_(holds_book),
+            MessageArchive.books_indexed.is_(False) & (MessageArchive.range_end > book.added_at)
+        ))
+        .order_by(MessageArchive.range_start.desc())
+    ).all()
+
+def archived_messages(book, before_id: int = None, limit: int = None) -> list:
+    """
+    up to `limit` archived messages for a book older than `before_id`, ascending.
+    walks the archives that can hold them newest month first and stops once
+    the page is full.
+    """
+    collected = []
+    for archive in candidate_archives(book, before_id):
+        rows = read_archive(archive.path, book.id, before_id)
+        collected = rows + collected
+        if limit is not None and len(collected) >= limit:
+            return collected[-limit:]
+    return collected
@@ -0,0 +1,48 @@
+# app/messages/commands.py
+from datetime import datetime, timedelta, timezone
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.extensions import db
+from app.messages.partitions import archive_old_messages, ensure_partitions, index_archives
+from app.models.message_client_id import MessageClientId
+
+messages_cli = AppGroup("messages", help="message table maintenance")
+
+@messages_cli.command("ensure-partitions")
+@click.option("--months-ahead", default=3, show_default=True, help="future months to create")
+def ensure_partitions_command(months_ahead: int):
+    """ create upcoming monthly partitions of the messages table """
+    created = ensure_partitions(months_ahead)
+    click.echo(f"created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+
+@messages_cli.command("archive")
+@click.option("--older-than-months", type=int, default=None, help="defaults to MESSAGE_ARCHIVE_AFTER_MONTHS")
+@click.option("--archive-dir", default=None, help="defaults to MESSAGE_ARCHIVE_DIR")
+def archive_command(older_than_months: int, archive_dir: str):
+    """ move whole months of old messages to compressed archive files """
+    archived = archive_old_messages(
+        older_than_months if older_than_months is not None else current_app.config["MESSAGE_ARCHIVE_AFTER_MONTHS"],
+        archive_dir or current_app.config["MESSAGE_ARCHIVE_DIR"]
+    )
+    for archive in archived:
+        click.echo(f"{archive.range_start:%Y-%m}: {archive.row_count} messages -> {archive.path}")
+    click.echo(f"archived {len(archived)} months")
+
+@messages_cli.command("index-archives")
+def index_archives_command():
+    """ record which books older archives hold, so history reads can skip them """
+    for archive in index_archives():
+        click.echo(f"{archive.range_start:%Y-%m}: indexed {archive.path}")
+
+@messages_cli.command("prune-client-ids")
+@click.option("--older-than-hours", type=int, default=None, help="defaults to MESSAGE_CLIENT_ID_TTL_HOURS")
+def prune_client_ids_command(older_than_hours: int):
+    """ forget message client ids past the retry window """
+    hours = older_than_hours if older_than_hours is not None else current_app.config["MESSAGE_CLIENT_ID_TTL_HOURS"]
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+    deleted = db.session.execute(
+        db.delete(MessageClientId).where(MessageClientId.created_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    click.echo(f"pruned {deleted} client ids older than {hours}h")
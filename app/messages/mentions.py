@@ -0,0 +1,62 @@
+# app/messages/mentions.py
+import re
+from app.extensions import db, socketio
+from app.metrics.collectors import SOCKET_EMITS
+from app.models.club_membership import ClubMembership
+from app.models.message_mention import MessageMention
+from app.models.user import User
+
+# "@name" not preceded by a word character, so emails don't count as mentions
+MENTION_PATTERN = re.compile(r"(?<![\w@])@([^\s@]+)")
+# punctuation that usually ends a sentence rather than a username
+TRAILING_PUNCTUATION = ".,;:!?)]}'\""
+# cap per message so one post can't page an entire club
+MAX_MENTIONS = 20
+
+def user_room(user_id: int) -> str:
+    """ personal socket room every authenticated connection joins """
+    return f"user_{user_id}"
+
+def parse_mentions(content: str) -> list:
+    """ distinct @usernames in `content`, in order of first appearance """
+    names = []
+    for match in MENTION_PATTERN.finditer(content):
+        name = match.group(1).rstrip(TRAILING_PUNCTUATION)
+        if len(name) >= 3 and name not in names:
+            names.append(name)
+            if len(names) == MAX_MENTIONS:
+                break
+    return names
+
+def record_mentions(message, club_id: int) -> list:
+    """
+    resolve the message's @usernames to active members of the club in one
+    query and stage a mention row for each. the author is never notified of
+    their own mention. the caller commits; returns the mentioned user ids.
+    """
+    names = parse_mentions(message.content)
+    if not names:
+        return []
+
+    user_ids = db.session.execute(
+        db.select(User.id)
+        .join(ClubMembership, ClubMembership.user_id == User.id)
+        .where(
+            User.username.in_(names),
+            User.id != message.user_id,
+            ClubMembership.club_id == club_id,
+            ClubMembership.is_banned == False
+        )
+    ).scalars().all()
+
+    db.session.add_all([
+        MessageMention(user_id, message.id, message.book_id, message.created_at)
+        for user_id in user_ids
+    ])
+    return user_ids
+
+def notify_mentions(message: dict, user_ids: list) -> None:
+    """ push a `mention` event to each mentioned user's personal room """
+    for user_id in user_ids:
+        SOCKET_EMITS.labels("mention").inc()
+        socketio.emit("mention", message, to=user_room(user_id))
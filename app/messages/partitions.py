@@ -0,0 +1,122 @@
+# app/messages/partitions.py
+import logging
+import os
+from datetime import datetime, timezone
+from sqlalchemy import func, text
+from app.extensions import db
+from app.messages.archive import archive_extension, index_archive, read_archive_ids, write_archive
+from app.models.feed_entry import FeedEntry
+from app.models.message import Message
+from app.models.message_client_id import MessageClientId
+from app.models.message_mention import MessageMention
+from app.models.message_archive import MessageArchive
+
+logger = logging.getLogger("bindery.partitions")
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+def add_months(dt: datetime, months: int) -> datetime:
+    index = dt.year * 12 + dt.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def partition_name(start: datetime) -> str:
+    return f"messages_y{start.year}m{start.month:02d}"
+
+def is_partitioned() -> bool:
+    """ true when `messages` is a postgres range-partitioned table """
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return bool(db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'messages'"
+    )).scalar())
+
+def partition_exists(name: str) -> bool:
+    return db.session.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+def ensure_partitions(months_ahead: int = 3) -> list:
+    """
+    create monthly partitions from the current month through `months_ahead`.
+    run ahead of time: rows for a month without a partition land in
+    messages_default, and a partition can't be created over rows already there.
+    """
+    if not is_partitioned():
+        return []
+
+    created = []
+    start = month_start(datetime.now(timezone.utc))
+    for n in range(months_ahead + 1):
+        lo = add_months(start, n)
+        name = partition_name(lo)
+        if partition_exists(name):
+            continue
+        db.session.execute(text(
+            f"CREATE TABLE {name} PARTITION OF messages "
+            f"FOR VALUES FROM ('{lo:%Y-%m-%d}') TO ('{add_months(lo, 1):%Y-%m-%d}')"
+        ))
+        created.append(name)
+    db.session.commit()
+    return created
+
+def archive_month(lo: datetime, archive_dir: str) -> MessageArchive:
+    """
+    copy one month of messages to a compressed archive file, record it, then
+    drop the partition (postgres) or delete the rows (other databases) along
+    with the month's mentions, feed entries and client ids, which would
+    otherwise point at messages that are gone.
+    """
+    hi = add_months(lo, 1)
+    rows = [row._asdict() for row in db.session.execute(
+        db.select(Message.id, Message.book_id, Message.user_id, Message.content, Message.created_at)
+        .where(Message.created_at >= lo, Message.created_at < hi)
+    )]
+
+    path = os.path.join(archive_dir, f"{partition_name(lo)}{archive_extension()}")
+    write_archive(rows, path)
+
+    archive = MessageArchive(range_start=lo, range_end=hi, path=path, row_count=len(rows))
+    db.session.add(archive)
+    db.session.flush()
+    index_archive(archive, rows)
+
+    # each copies its message's created_at
+    for model in (MessageMention, FeedEntry, MessageClientId):
+        db.session.execute(db.delete(model).where(model.created_at >= lo, model.created_at < hi))
+
+    name = partition_name(lo)
+    if is_partitioned() and partition_exists(name):
+        db.session.execute(text(f"ALTER TABLE messages DETACH PARTITION {name}"))
+        db.session.execute(text(f"DROP TABLE {name}"))
+    else:
+        Message.query.filter(Message.created_at >= lo, Message.created_at < hi).delete(
+            synchronize_session=False
+        )
+    db.session.commit()
+
+    logger.info("archived %d messages for %s to %s", len(rows), lo.strftime("%Y-%m"), path)
+    return archive
+
+def archive_old_messages(older_than_months: int, archive_dir: str) -> list:
+    """ archive every whole month older than `older_than_months` that still has rows """
+    cutoff = add_months(month_start(datetime.now(timezone.utc)), -older_than_months)
+    oldest = db.session.query(func.min(Message.created_at)).scalar()
+    if oldest is None:
+        return []
+
+    archived = []
+    lo = month_start(oldest)
+    while lo < cutoff:
+        if not MessageArchive.query.filter_by(range_start=lo).first():
+            archived.append(archive_month(lo, archive_dir))
+        lo = add_months(lo, 1)
+    return archived
+
+def index_archives() -> list:
+    """ record the books held by archives written before message_archive_books existed """
+    indexed = []
+    for archive in MessageArchive.query.filter_by(books_indexed=False).order_by(MessageArchive.range_start):
+        index_archive(archive, read_archive_ids(archive.path))
+        db.session.commit()
+        indexed.append(archive)
+    return indexed
@@ -0,0 +1,156 @@
+# app/messages/recent.py
+import bisect
+import threading
+from collections import OrderedDict
+from app.extensions import db
+from app.metrics.collectors import RECENT_MESSAGES_BYTES, RECENT_MESSAGES_READS
+from app.models.message import Message
+
+# rough cost of a cached message's dict, ints and datetime on top of its text
+ENTRY_OVERHEAD = 400
+
+def entry_size(message: dict) -> int:
+    return ENTRY_OVERHEAD + len(message["content"])
+
+class _Buffer:
+    """ a book's newest messages, ascending by id, with no gaps """
+    __slots__ = ("ids", "messages", "complete", "size")
+
+    def __init__(self, messages: list, complete: bool) -> None:
+        self.messages = messages
+        self.ids = [m["id"] for m in messages]
+        # true when the buffer holds every database row for the book
+        self.complete = complete
+        self.size = sum(entry_size(m) for m in messages)
+
+class RecentMessages:
+    """
+    bounded per-book buffers of the newest messages, warmed from the database
+    on first read and appended to on post. books are evicted least recently
+    used once the estimated total passes `max_bytes`. buffers live in this
+    process and only see posts made through it, so run one web process (the
+    socketio default) or set RECENT_MESSAGES_PER_BOOK=0.
+    """
+
+    def __init__(self, per_book: int, max_bytes: int) -> None:
+        self.per_book = per_book
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._lock = threading.Lock()
+        self._books = OrderedDict()
+        # book id -> {token: dirty} for warms in flight; a post during a warm
+        # means the snapshot may miss it, so that snapshot isn't installed
+        self._warming = {}
+
+    def append(self, book_id: int, message: dict) -> None:
+        """ add a just-committed message to the book's buffer if it is warm """
+        with self._lock:
+            for token in self._warming.get(book_id, ()):
+                self._warming[book_id][token] = True
+            buf = self._books.get(book_id)
+            if buf is None:
+                return
+            # commits can finish out of id order
+            i = bisect.bisect(buf.ids, message["id"])
+            if i and buf.ids[i - 1] == message["id"]:
+                # a warm that started after the commit already loaded it
+                return
+            buf.ids.insert(i, message["id"])
+            buf.messages.insert(i, message)
+            self._grow(buf, entry_size(message))
+            while len(buf.ids) > self.per_book:
+                buf.ids.pop(0)
+                self._grow(buf, -entry_size(buf.messages.pop(0)))
+                buf.complete = False
+            self._books.move_to_end(book_id)
+            self._evict()
+
+    def discard(self, book_id: int) -> None:
+        with self._lock:
+            buf = self._books.pop(book_id, None)
+            if buf is not None:
+                self._grow(None, -buf.size)
+
+    def read(self, book_id: int, limit: int = None, before: int = None, after: int = None):
+        """
+        messages for a page, ascending, or None when the buffer can't answer it
+        and the caller should query the database.
+          after:          everything newer than `after` (up to `limit`, oldest first)
+          limit / before: the newest `limit` older than `before`
+          neither:        the full history, only if the buffer holds all of it
+        """
+        with self._lock:
+            buf = self._books.get(book_id)
+            if buf is not None:
+                self._books.move_to_end(book_id)
+        if buf is None:
+            buf = self._warm(book_id)
+            result = "warm"
+        else:
+            result = "hit"
+
+        with self._lock:
+            page = self._page(buf, limit, before, after)
+        RECENT_MESSAGES_READS.labels("miss" if page is None else result).inc()
+        return page
+
+    def _page(self, buf: _Buffer, limit, before, after):
+        ids, messages = buf.ids, buf.messages
+        if after is not None:
+            # contiguous from ids[0], so everything newer than `after` is here
+            if not buf.complete and (not ids or ids[0] > after):
+                return None
+            start = bisect.bisect_right(ids, after)
+            return messages[start:] if limit is None else messages[start:start + limit]
+
+        end = len(ids) if before is None else bisect.bisect_left(ids, before)
+        if limit is None:
+            return messages[:end] if buf.complete else None
+        start = end - limit
+        if start < 0 and not buf.complete:
+            return None
+        return messages[max(start, 0):end]
+
+    def _warm(self, book_id: int) -> _Buffer:
+        token = object()
+        with self._lock:
+            self._warming.setdefault(book_id, {})[token] = False
+
+        # always from the primary: a lagging replica would leave a permanent gap
+        rows = db.session.execute(
+            db.select(Message.id, Message.user_id, Message.content, Message.created_at)
+            .where(Message.book_id == book_id)
+            .order_by(Message.id.desc())
+            .limit(self.per_book),
+            bind_arguments={"bind": db.engine}
+        ).all()
+        buf = _Buffer([row._asdict() for row in reversed(rows)], complete=len(rows) < self.per_book)
+
+        with self._lock:
+            pending = self._warming[book_id]
+            dirty = pending.pop(token)
+            if not pending:
+                del self._warming[book_id]
+            if not dirty and book_id not in self._books:
+                self._books[book_id] = buf
+                self._grow(None, buf.size)
+                self._evict()
+        return buf
+
+    def _grow(self, buf, delta: int) -> None:
+        if buf is not None:
+            buf.size += delta
+        self.size += delta
+        RECENT_MESSAGES_BYTES.inc(delta)
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self._books:
+            _, buf = self._books.popitem(last=False)
+            self._grow(None, -buf.size)
+
+def init_recent_messages(app) -> None:
+    """ attach the buffer as app.extensions["recent_messages"] (None when disabled) """
+    per_book = app.config["RECENT_MESSAGES_PER_BOOK"]
+    app.extensions["recent_messages"] = RecentMessages(
+        per_book, app.config["RECENT_MESSAGES_MAX_BYTES"]
+    ) if per_book > 0 else None
@@ -1,88 +1,305 @@
 # app/messages/resources.py
+import json
+import time
+from datetime import timezone
 from flask_restful import Resource, reqparse
-from flask import g
+from flask import Response, current_app, g, request, stream_with_context
 from app.extensions import db, socketio
+from app.metrics.collectors import MESSAGE_WRITE_SECONDS, SOCKET_EMITS
 from app.auth.resources import jwt_required
+from app.replicas import read_replica
+from app import hot_queries
 from app.models.club_membership import ClubMembership
 from app.models.book import Book
 from app.models.message import Message
+from app.models.message_mention import MessageMention
+from app.models.message_client_id import MessageClientId
+from app.messages.archive import archived_messages
+from app.messages.mentions import notify_mentions, record_mentions
+from app.compression import choose_encoding, stream_compressed
+from app.jobs.queue import enqueue
+from app.feed.timeline import fan_out
+
+EXPORT_BATCH_SIZE = 1000
+MENTIONS_PAGE_SIZE = 50
+
+def epoch_ms(dt) -> int:
+    """ milliseconds since the epoch; naive datetimes are stored as utc """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+def compact_messages(messages: list) -> dict:
+    """
+    columnar wire format: one array per field and epoch-ms timestamps instead of
+    repeating keys and isoformat strings for every message
+    """
+    return {
+        "format": "compact",
+        "id": [m["id"] for m in messages],
+        "user_id": [m["user_id"] for m in messages],
+        "content": [m["content"] for m in messages],
+        "created_at": [epoch_ms(m["created_at"]) for m in messages],
+    }
 
 class MessageResource(Resource):
+    @read_replica
     @jwt_required
     def get(self, book_id: int): 
         """
-        retrieve messages for a book
+        retrieve messages for a book, oldest first.
+        optional paging: ?limit=<n> returns the newest n, ?before=<message id>
+        pages further back. pages past the oldest database row are read from
+        the message archive; without ?limit only database rows are returned. ?after=<message id> returns what was posted since
+        (for reconnect catch-up). ?format=compact returns columnar arrays.
+        recent pages are served from the in-memory buffer when it holds them.
         """
-        book = Book.query.get(book_id)
+        parser = reqparse.RequestParser()
+        parser.add_argument("limit", type=int, location="args")
+        parser.add_argument("before", type=int, location="args")
+        parser.add_argument("after", type=int, location="args")
+        parser.add_argument("format", choices=("full", "compact"), default="full", location="args")
+        args = parser.parse_args()
+
+        if args["limit"] is not None and not 1 <= args["limit"] <= current_app.config["MESSAGE_PAGE_MAX"]:
+            return {"error": f"limit must be between 1 and {current_app.config['MESSAGE_PAGE_MAX']}"}, 400
+        if args["after"] is not None and args["before"] is not None:
+            return {"error": "before and after can't be combined"}, 400
+
+        book = hot_queries.book_by_id(book_id)
         if not book: return {"error": "Book not found"}, 404
 
-        membership = ClubMembership.query.filter_by(
-            club_id=book.club_id,
-            user_id=g.user_id,
-            is_banned=False
-        ).first()
+        membership = hot_queries.active_membership(book.club_id, g.user_id)
 
         if not membership:
             return {"error": "You are not an active member of this club"}, 403
 
-        messages = Message.query.filter_by(book_id=book_id).order_by(Message.created_at.asc()).all()
+        recent = current_app.extensions.get("recent_messages")
+        messages = None
+        if recent is not None:
+            messages = recent.read(book_id, limit=args["limit"], before=args["before"], after=args["after"])
+
+        if messages is None:
+            query = db.select(Message.id, Message.user_id, Message.content, Message.created_at) \
+                .where(Message.book_id == book_id)
+            if args["before"] is not None:
+                query = query.where(Message.id < args["before"])
+
+            if args["after"] is not None:
+                query = query.where(Message.id > args["after"]).order_by(Message.id.asc())
+                rows = db.session.execute(query.limit(args["limit"])).all()
+            elif args["limit"] is None:
+                rows = db.session.execute(query.order_by(Message.id.asc())).all()
+            else:
+                rows = db.session.execute(query.order_by(Message.id.desc()).limit(args["limit"])).all()[::-1]
+            messages = [row._asdict() for row in rows]
+
+        # a short page has reached past the oldest database row: top it up from the archive
+        missing = None if args["limit"] is None else args["limit"] - len(messages)
+        if args["after"] is None and missing is not None and missing > 0:
+            oldest_id = messages[0]["id"] if messages else args["before"]
+            messages = archived_messages(book, before_id=oldest_id, limit=missing) + messages
+
+        if args["format"] == "compact":
+            return compact_messages(messages), 200
 
         return [{
-            "id": msg.id,
-            "user_id": msg.user_id,
-            "content": msg.content,
-            "created_at": msg.created_at.isoformat()
+            "id": msg["id"],
+            "user_id": msg["user_id"],
+            "content": msg["content"],
+            "created_at": msg["created_at"].isoformat()
         } for msg in messages], 200
 
     @jwt_required
     def post(self, book_id: int):
         """
-        create a new message in a book's discussion
+        create a new message in a book's discussion.
+        an optional client_id (or Idempotency-Key header) makes retries safe:
+        posting the same id again returns the original message with 200
+        instead of writing a duplicate. new_message echoes it back.
         """
         parser = reqparse.RequestParser()
         parser.add_argument("content", type=str, required=True, help="Message content is required")
+        parser.add_argument("client_id", type=str)
         args = parser.parse_args()
 
-        book = Book.query.get(book_id)
+        client_id = args["client_id"]
+        if client_id is None:
+            client_id = request.headers.get("Idempotency-Key")
+        if client_id is not None and not 1 <= len(client_id) <= MessageClientId.MAX_LENGTH:
+            return {"error": f"client_id must be 1 to {MessageClientId.MAX_LENGTH} characters"}, 400
+
+        book = hot_queries.book_by_id(book_id)
         if not book: return {"error": "Book not found"}, 404
 
         # check membership
-        membership = ClubMembership.query.filter_by(
-            club_id=book.club_id,
-            user_id=g.user_id,
-            is_banned=False
-        ).first()
+        membership = hot_queries.active_membership(book.club_id, g.user_id)
 
         if not membership:
             return {"error": "You are not an active member of this club"}, 403
 
+        # a retry of a post that already went through: answer without writing
+        if client_id is not None:
+            original = MessageClientId.original(g.user_id, client_id)
+            if original is not None:
+                return self._replay(original, book_id, client_id)
+
         # create and store message
+        write_started = time.perf_counter()
         new_message = Message(
             book_id=book_id,
             user_id=g.user_id,
             content=args["content"],
         )
         db.session.add(new_message)
+        # flush for the id, then store @mentions and feed entries in the same transaction
+        db.session.flush()
+        if client_id is not None and not MessageClientId.claim(client_id, new_message):
+            # a concurrent retry committed first
+            db.session.rollback()
+            return self._replay(MessageClientId.original(g.user_id, client_id), book_id, client_id)
+        mentioned = record_mentions(new_message, book.club_id)
+        fan_out(new_message, book.club_id, current_app.config["FEED_FANOUT_MAX_MEMBERS"])
         db.session.commit()
+        MESSAGE_WRITE_SECONDS.observe(time.perf_counter() - write_started)
 
-        # broadcast message via socketio
-        socketio.emit(
-            "new_message",
-            {
+        recent = current_app.extensions.get("recent_messages")
+        if recent is not None:
+            recent.append(book_id, {
                 "id": new_message.id,
-                "book_id": new_message.book_id,
                 "user_id": new_message.user_id,
                 "content": new_message.content,
-                "created_at": new_message.created_at.isoformat()
-            },
-            to=f"book_{book_id}"
-        )
+                "created_at": new_message.created_at
+            })
 
-        return {
+        message = {
             "id": new_message.id,
             "book_id": new_message.book_id,
             "user_id": new_message.user_id,
             "content": new_message.content,
             "created_at": new_message.created_at.isoformat()
-        }, 201
+        }
+        if client_id is not None:
+            message["client_id"] = client_id
+
+        # broadcast message via socketio
+        SOCKET_EMITS.labels("new_message").inc()
+        socketio.emit("new_message", message, to=f"book_{book_id}")
+        notify_mentions(message, mentioned)
+
+        return message, 201
+
+    @staticmethod
+    def _replay(original, book_id: int, client_id: str):
+        """ response for a repeated client_id: the stored message, not a new one """
+        if original is None or original.book_id != book_id:
+            return {"error": "client_id was already used for another message"}, 409
+        return {
+            "id": original.id,
+            "book_id": original.book_id,
+            "user_id": original.user_id,
+            "content": original.content,
+            "created_at": original.created_at.isoformat(),
+            "client_id": client_id
+        }, 200
+
+class MentionsResource(Resource):
+    @read_replica
+    @jwt_required
+    def get(self):
+        """
+        messages that @mention the current user, newest first, from clubs they
+        are still an active member of. page with ?limit=<n>&before=<message id>
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument("limit", type=int, default=MENTIONS_PAGE_SIZE, location="args")
+        parser.add_argument("before", type=int, location="args")
+        args = parser.parse_args()
+
+        if not 1 <= args["limit"] <= current_app.config["MESSAGE_PAGE_MAX"]:
+            return {"error": f"limit must be between 1 and {current_app.config['MESSAGE_PAGE_MAX']}"}, 400
+
+        query = db.select(Message.id, Message.book_id, Message.user_id, Message.content, Message.created_at) \
+            .select_from(MessageMention) \
+            .join(Message, (Message.id == MessageMention.message_id) & (Message.created_at == MessageMention.created_at)) \
+            .join(Book, Book.id == MessageMention.book_id) \
+            .join(ClubMembership, (ClubMembership.club_id == Book.club_id) & (ClubMembership.user_id == MessageMention.user_id)) \
+            .where(MessageMention.user_id == g.user_id, ClubMembership.is_banned == False)
+        if args["before"] is not None:
+            query = query.where(MessageMention.message_id < args["before"])
+        rows = db.session.execute(query.order_by(MessageMention.message_id.desc()).limit(args["limit"])).all()
+
+        return [{
+            "id": row.id,
+            "book_id": row.book_id,
+            "user_id": row.user_id,
+            "content": row.content,
+            "created_at": row.created_at.isoformat()
+        } for row in rows], 200
+
+class MessageExportResource(Resource):
+    @read_replica
+    @jwt_required
+    def get(self, book_id: int):
+        """
+        stream a book's full database history as newline-delimited json,
+        compressed on the fly when the client accepts gzip or br
+        """
+        book = hot_queries.book_by_id(book_id)
+        if not book: return {"error": "Book not found"}, 404
+
+        membership = hot_queries.active_membership(book.club_id, g.user_id)
+
+        if not membership:
+            return {"error": "You are not an active member of this club"}, 403
+
+        query = db.select(Message.id, Message.user_id, Message.content, Message.created_at) \
+            .where(Message.book_id == book_id) \
+            .order_by(Message.id.asc()) \
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        # the stream runs after @read_replica has returned, so pick the engine now
+        bind = db.session.get_bind(clause=query)
+
+        def generate():
+            for row in db.session.execute(query, bind_arguments={"bind": bind}):
+                yield json.dumps({
+                    "id": row.id,
+                    "user_id": row.user_id,
+                    "content": row.content,
+                    "created_at": epoch_ms(row.created_at)
+                }) + "\n"
+
+        body = stream_with_context(generate())
+        headers = {"Content-Disposition": f"attachment; filename=book_{book_id}_messages.ndjson"}
+        encoding = choose_encoding()
+        if encoding:
+            body = stream_compressed(body, encoding, current_app.config["COMPRESS_LEVEL"])
+            headers["Content-Encoding"] = encoding
+        return Response(body, mimetype="application/x-ndjson", headers=headers)
+
+class MessageExportJobResource(Resource):
+    @jwt_required
+    def post(self, book_id: int):
+        """
+        queue a background export of a book's history; poll /jobs/<id> for the result.
+        repeated requests before new messages arrive return the same job
+        """
+        book = hot_queries.book_by_id(book_id)
+        if not book: return {"error": "Book not found"}, 404
+
+        membership = hot_queries.active_membership(book.club_id, g.user_id)
+
+        if not membership:
+            return {"error": "You are not an active member of this club"}, 403
+
+        up_to_id = db.session.execute(
+            db.select(db.func.max(Message.id)).where(Message.book_id == book_id)
+        ).scalar() or 0
+        job = enqueue(
+            "export_book_messages",
+            {"book_id": book_id, "requested_by": g.user_id, "up_to_id": up_to_id},
+            idempotency_key=f"export_book_messages:{book_id}:{g.user_id}:{up_to_id}"
+        )
+        db.session.commit()
 
+        return {"job_id": job.id, "status": job.status}, 202
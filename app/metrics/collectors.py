@@ -0,0 +1,101 @@
+# app/metrics/collectors.py
+import os
+import time
+from flask import g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# prometheus_client collectors are lock-protected (green under eventlet/gevent
+# monkey patching). with PROMETHEUS_MULTIPROC_DIR set each worker writes to its
+# own mmap files and /metrics aggregates them at scrape time.
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "bindery_http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ["endpoint", "method", "status"],
+)
+SOCKET_CONNECTIONS = Gauge(
+    "bindery_socket_connections",
+    "Connected Socket.IO clients",
+    multiprocess_mode="livesum",
+)
+SOCKET_ROOMS = Gauge(
+    "bindery_socket_rooms",
+    "Book rooms with at least one member",
+    multiprocess_mode="livesum",
+)
+SOCKET_ROOM_MEMBERS = Gauge(
+    "bindery_socket_room_members",
+    "Socket memberships across all book rooms",
+    multiprocess_mode="livesum",
+)
+SOCKET_ROOM_SIZE = Histogram(
+    "bindery_socket_room_size",
+    "Members in a book room, observed on each join",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+SOCKET_EMITS = Counter(
+    "bindery_socket_emits_total",
+    "Socket.IO events emitted by the server",
+    ["event"],
+)
+MESSAGE_WRITE_SECONDS = Histogram(
+    "bindery_message_write_duration_seconds",
+    "Time to persist a new message",
+)
+RECENT_MESSAGES_READS = Counter(
+    "bindery_recent_messages_reads_total",
+    "Message history reads by recent-message buffer outcome",
+    ["result"],
+)
+RECENT_MESSAGES_BYTES = Gauge(
+    "bindery_recent_messages_bytes",
+    "Estimated size of the recent-message buffers",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "bindery_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "bindery_db_pool_wait_seconds",
+    "Time spent waiting for a pool connection",
+)
+DB_POOL_TIMEOUTS = Counter(
+    "bindery_db_pool_timeouts_total",
+    "Pool checkouts that timed out",
+)
+
+def render_latest():
+    """ (body, content_type) for a scrape, merging worker files in multiprocess mode """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def init_http_metrics(app) -> None:
+    """ time every request into HTTP_REQUEST_SECONDS """
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.get("request_started")
+        if started is not None:
+            HTTP_REQUEST_SECONDS.labels(
+                request.endpoint or "unknown",
+                request.method,
+                response.status_code
+            ).observe(time.perf_counter() - started)
+        return response
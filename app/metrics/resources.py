@@ -0,0 +1,29 @@
+# app/metrics/resources.py
+from flask import Response
+from flask_restful import Resource
+from app.extensions import db
+from app.metrics.collectors import render_latest
+from app.pool import pool_stats
+from app.profiling import request_stats
+
+class PrometheusMetricsResource(Resource):
+    def get(self):
+        """
+        prometheus text exposition of http, db pool and socket.io metrics
+        """
+        body, content_type = render_latest()
+        return Response(body, mimetype=content_type)
+
+class PoolMetricsResource(Resource):
+    def get(self):
+        """
+        connection pool usage: checked out, overflow, wait time, timeouts
+        """
+        return pool_stats.snapshot(db.engine.pool), 200
+
+class RequestMetricsResource(Resource):
+    def get(self):
+        """
+        per-endpoint latency, sql counts and N+1 flags (requires PROFILING_ENABLED)
+        """
+        return request_stats.snapshot(), 200
@@ -4,3 +4,9 @@ from .club import Club
 from .club_membership import ClubMembership
 from .book import Book
 from .message import Message
+from .message_archive import MessageArchive, MessageArchiveBook
+from .message_mention import MessageMention
+from .feed_entry import FeedEntry
+from .message_client_id import MessageClientId
+from .job import Job
+from . import versioning
@@ -1,9 +1,13 @@
 # app/models/book.py
 from app.extensions import db
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert
 
 class Book(db.Model):
     __tablename__ = "books"
+    __table_args__ = (
+        db.Index("ix_books_club_id_added_at", "club_id", "added_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     club_id = db.Column(db.Integer, db.ForeignKey("clubs.id"), nullable=False)
@@ -18,3 +22,19 @@ class Book(db.Model):
 
     def __repr__(self) -> str:
         return f"<Book {self.title} by {self.author}>"
+
+    @staticmethod
+    def bulk_create(club_id: int, books: list) -> list:
+        """
+        add many books with one multi-row INSERT ... RETURNING.
+        `books` is a list of {"title", "author"} dicts; added_at is spaced a
+        microsecond apart so list order is preserved when sorting by added_at.
+        """
+        now = datetime.now(timezone.utc)
+        stmt = insert(Book).values([{
+            "club_id": club_id,
+            "title": book["title"],
+            "author": book["author"],
+            "added_at": now + timedelta(microseconds=i),
+        } for i, book in enumerate(books)]).returning(Book.id, Book.title, Book.author, Book.added_at)
+        return sorted(db.session.execute(stmt).all(), key=lambda row: row.added_at)
@@ -22,6 +22,14 @@ class Club(db.Model):
     creator_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     name = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    # bumped whenever the club, its books, its memberships or a member's username change.
+    # conditional GETs derive their ETags from it (see app/http_cache.py)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    # set on delete; the purge_club job removes the row and its books/messages later
+    deleted_at = db.Column(db.DateTime, nullable=True)
+    # messages from this id on are in every active member's feed_entries timeline;
+    # null while the club is above FEED_FANOUT_MAX_MEMBERS (see app/feed/timeline.py)
+    feed_fanout_from = db.Column(db.Integer, nullable=True)
 
     def __init__(self, creator_id: int, name: str):
         self.creator_id = creator_id
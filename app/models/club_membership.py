@@ -1,9 +1,14 @@
 # app/models/club_membership.py
 from datetime import datetime, timezone
+from sqlalchemy import delete, select, true
+from sqlalchemy.dialects import postgresql, sqlite
 from app.extensions import db
 
 class ClubMembership(db.Model):
     __tablename__ = "club_memberships"
+    __table_args__ = (
+        db.Index("ix_club_memberships_user_id", "user_id"),
+    )
 
     club_id = db.Column(db.Integer, db.ForeignKey("clubs.id"), primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
@@ -18,3 +23,49 @@ class ClubMembership(db.Model):
     def __repr__(self) -> str:
         return f"<ClubMembership club={self.club_id} user={self.user_id} banned={self.is_banned}>"
 
+    @staticmethod
+    def bulk_ban(club_id: int, user_ids: list) -> set:
+        """
+        ban many users in one INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+        users without a membership get a banned row; ids with no user row are
+        skipped by the select. returns the user ids that are now banned.
+        """
+        from app.models.user import User
+
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        now = datetime.now(timezone.utc)
+
+        stmt = insert(ClubMembership).from_select(
+            ["club_id", "user_id", "is_banned", "joined_at"],
+            select(db.literal(club_id), User.id, true(), db.literal(now))
+            .where(User.id.in_(user_ids))
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ClubMembership.club_id, ClubMembership.user_id],
+            set_={"is_banned": True}
+        ).returning(ClubMembership.user_id)
+        return set(db.session.execute(stmt).scalars())
+
+    @staticmethod
+    def bulk_unban(club_id: int, user_ids: list) -> set:
+        """
+        lift bans by deleting the banned rows; unbanned users rejoin through the
+        normal join endpoint. returns the user ids that were unbanned.
+        """
+        stmt = delete(ClubMembership).where(
+            ClubMembership.club_id == club_id,
+            ClubMembership.user_id.in_(user_ids),
+            ClubMembership.is_banned.is_(True)
+        ).returning(ClubMembership.user_id)
+        return set(db.session.execute(stmt).scalars())
+
+    @staticmethod
+    def bulk_kick(club_id: int, user_ids: list) -> set:
+        """ remove active (non-banned) members. returns the user ids removed """
+        stmt = delete(ClubMembership).where(
+            ClubMembership.club_id == club_id,
+            ClubMembership.user_id.in_(user_ids),
+            ClubMembership.is_banned.is_(False)
+        ).returning(ClubMembership.user_id)
+        return set(db.session.execute(stmt).scalars())
@@ -0,0 +1,32 @@
+# app/models/feed_entry.py
+from app.extensions import db
+
+class FeedEntry(db.Model):
+    """
+    a message in a member's precomputed activity timeline. written for every
+    active member when a message is posted in a club at or below
+    FEED_FANOUT_MAX_MEMBERS; larger clubs are merged at read time instead
+    (see app/feed/timeline.py). like message_mentions there is no foreign key
+    to the partitioned messages table, and created_at completes its key.
+    """
+    __tablename__ = "feed_entries"
+    __table_args__ = (
+        db.Index("ix_feed_entries_club_id", "club_id"),
+    )
+
+    # (user_id, message_id) doubles as the "newest first" timeline index
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    message_id = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("books.id"), nullable=False)
+    club_id = db.Column(db.Integer, db.ForeignKey("clubs.id"), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    def __init__(self, user_id: int, message_id: int, book_id: int, club_id: int, created_at) -> None:
+        self.user_id = user_id
+        self.message_id = message_id
+        self.book_id = book_id
+        self.club_id = club_id
+        self.created_at = created_at
+
+    def __repr__(self) -> str:
+        return f"<FeedEntry User {self.user_id} Message {self.message_id}>"
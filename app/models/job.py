@@ -0,0 +1,43 @@
+# app/models/job.py
+from app.extensions import db
+from datetime import datetime, timezone
+
+class Job(db.Model):
+    """ a unit of deferred work in the database-backed job queue (see app/jobs) """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    idempotency_key = db.Column(db.String(255), unique=True, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    locked_by = db.Column(db.String(255), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, name: str, payload: dict, idempotency_key: str = None, max_attempts: int = 5, run_at: datetime = None) -> None:
+        self.name = name
+        self.payload = payload
+        self.idempotency_key = idempotency_key
+        self.max_attempts = max_attempts
+        self.status = Job.QUEUED
+        self.attempts = 0
+        if run_at is not None:
+            self.run_at = run_at
+
+    def __repr__(self) -> str:
+        return f"<Job {self.id} {self.name} {self.status} attempts={self.attempts}>"
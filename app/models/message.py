@@ -4,6 +4,10 @@ from datetime import datetime, timezone
 
 class Message(db.Model):
     __tablename__ = "messages"
+    __table_args__ = (
+        db.Index("ix_messages_book_id_id", "book_id", "id"),
+        db.Index("ix_messages_user_id", "user_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     book_id = db.Column(db.Integer, db.ForeignKey("books.id"), nullable=False)
@@ -0,0 +1,58 @@
+# app/models/message_archive.py
+from app.extensions import db
+from datetime import datetime, timezone
+
+class MessageArchive(db.Model):
+    """ one month of messages moved out of the database into a cold storage file """
+    __tablename__ = "message_archives"
+
+    id = db.Column(db.Integer, primary_key=True)
+    range_start = db.Column(db.DateTime, unique=True, nullable=False)
+    range_end = db.Column(db.DateTime, nullable=False)
+    path = db.Column(db.String(1024), nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    # false for archives written before message_archive_books existed, until
+    # `flask messages index-archives` has recorded their books
+    books_indexed = db.Column(db.Boolean, default=True, nullable=False)
+
+    def __init__(self, range_start: datetime, range_end: datetime, path: str, row_count: int) -> None:
+        self.range_start = range_start
+        self.range_end = range_end
+        self.path = path
+        self.row_count = row_count
+        self.books_indexed = True
+
+    def __repr__(self) -> str:
+        return f"<MessageArchive {self.range_start:%Y-%m} rows={self.row_count}>"
+
+class MessageArchiveBook(db.Model):
+    """
+    which books an archive holds and their id range, so history reads only
+    open archive files that can contain the page being asked for.
+    no foreign keys: purged books and clubs leave their archives behind.
+    """
+    __tablename__ = "message_archive_books"
+
+    book_id = db.Column(db.Integer, primary_key=True)
+    archive_id = db.Column(db.Integer, db.ForeignKey("message_archives.id"), primary_key=True)
+    min_id = db.Column(db.Integer, nullable=False)
+    max_id = db.Column(db.Integer, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+
+    @staticmethod
+    def rows_for(archive_id: int, rows: list) -> list:
+        """ one row per book in `rows` (message dicts), ready for an executemany insert """
+        books = {}
+        for r in rows:
+            entry = books.get(r["book_id"])
+            if entry is None:
+                books[r["book_id"]] = {
+                    "book_id": r["book_id"], "archive_id": archive_id,
+                    "min_id": r["id"], "max_id": r["id"], "row_count": 1
+                }
+            else:
+                entry["min_id"] = min(entry["min_id"], r["id"])
+                entry["max_id"] = max(entry["max_id"], r["id"])
+                entry["row_count"] += 1
+        return list(books.values())
@@ -0,0 +1,67 @@
+# app/models/message_client_id.py
+from sqlalchemy.dialects import postgresql, sqlite
+from app.extensions import db
+from app.models.message import Message
+
+class MessageClientId(db.Model):
+    """
+    client-generated id (or Idempotency-Key) of a posted message, unique per
+    user, so a retried post returns the original row instead of writing again.
+    kept in its own table because a unique index on the partitioned messages
+    table would have to include created_at. rows only need to outlive client
+    retries; `flask messages prune-client-ids` drops old ones.
+    """
+    __tablename__ = "message_client_ids"
+    __table_args__ = (
+        db.Index("ix_message_client_ids_message_id", "message_id"),
+        db.Index("ix_message_client_ids_created_at", "created_at"),
+    )
+
+    MAX_LENGTH = 64
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    client_id = db.Column(db.String(MAX_LENGTH), primary_key=True)
+    message_id = db.Column(db.Integer, nullable=False)
+    book_id = db.Column(db.Integer, db.ForeignKey("books.id"), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    def __init__(self, user_id: int, client_id: str, message_id: int, book_id: int, created_at) -> None:
+        self.user_id = user_id
+        self.client_id = client_id
+        self.message_id = message_id
+        self.book_id = book_id
+        self.created_at = created_at
+
+    def __repr__(self) -> str:
+        return f"<MessageClientId {self.client_id} User {self.user_id} -> Message {self.message_id}>"
+
+    @staticmethod
+    def claim(client_id: str, message) -> bool:
+        """
+        record `client_id` for a just-flushed message with INSERT ... ON
+        CONFLICT DO NOTHING. a concurrent duplicate waits on the unique key
+        and then loses; returns False when the id was already taken, in
+        which case the caller rolls back its message.
+        """
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(MessageClientId).values(
+            user_id=message.user_id,
+            client_id=client_id,
+            message_id=message.id,
+            book_id=message.book_id,
+            created_at=message.created_at
+        ).on_conflict_do_nothing(
+            index_elements=[MessageClientId.user_id, MessageClientId.client_id]
+        ).returning(MessageClientId.message_id)
+        return db.session.execute(stmt).scalar() is not None
+
+    @staticmethod
+    def original(user_id: int, client_id: str):
+        """ the message previously posted by this user under `client_id`, or None """
+        return db.session.execute(
+            db.select(Message)
+            .join(MessageClientId, (MessageClientId.message_id == Message.id)
+                  & (MessageClientId.created_at == Message.created_at))
+            .where(MessageClientId.user_id == user_id, MessageClientId.client_id == client_id)
+        ).scalar()
@@ -0,0 +1,29 @@
+# app/models/message_mention.py
+from app.extensions import db
+
+class MessageMention(db.Model):
+    """
+    one row per user @mentioned in a message, written alongside the message.
+    no foreign key to messages: on postgres that table is partitioned by
+    created_at, so its key is (id, created_at). created_at is copied here so
+    lookups can join on the full key and prune partitions.
+    """
+    __tablename__ = "message_mentions"
+    __table_args__ = (
+        db.Index("ix_message_mentions_message_id", "message_id"),
+    )
+
+    # (user_id, message_id) doubles as the "my mentions, newest first" index
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    message_id = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("books.id"), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    def __init__(self, user_id: int, message_id: int, book_id: int, created_at) -> None:
+        self.user_id = user_id
+        self.message_id = message_id
+        self.book_id = book_id
+        self.created_at = created_at
+
+    def __repr__(self) -> str:
+        return f"<MessageMention User {self.user_id} in Message {self.message_id}>"
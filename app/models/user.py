@@ -1,13 +1,22 @@
 # app/models/user.py
+import secrets
 from app.extensions import db
 from datetime import datetime, timezone
+from sqlalchemy import case, exists, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+USERNAME_MAX_LENGTH = 50
+UPSERT_ATTEMPTS = 3
+# "_" + secrets.token_hex(3)
+SUFFIX_LENGTH = 7
 
 class User(db.Model):
     __tablename__ = "users"
 
     id = db.Column(db.Integer, primary_key=True)
     google_id = db.Column(db.String(255), unique=True, nullable=False)
-    username = db.Column(db.String(50), unique=True, nullable=False)
+    username = db.Column(db.String(USERNAME_MAX_LENGTH), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default= lambda: datetime.now(timezone.utc), nullable=False)
 
     def __init__(self, google_id: str, username: str) -> None:
@@ -18,13 +27,125 @@ class User(db.Model):
         return f"<User {self.username}>"
 
 
+    @staticmethod
+    def _username_expr(google_id: str, username: str):
+        """
+        sql expression that resolves to `username`, or `username_<suffix>` if
+        another account already holds it. evaluated inside the insert itself
+        so the check and the write share one round trip.
+        """
+        suffix = "_" + secrets.token_hex(3)
+        base = username[:USERNAME_MAX_LENGTH]
+        fallback = User._suffix_prefix(username) + suffix
+        taken = exists().where(
+            User.username == base,
+            User.google_id != google_id
+        )
+        return case((taken, literal(fallback)), else_=literal(base))
+
+    @staticmethod
+    def _suffix_prefix(username: str) -> str:
+        """ the part of `username` kept in front of a collision suffix (_ + 6 hex) """
+        return username[:USERNAME_MAX_LENGTH - SUFFIX_LENGTH]
+
+    @staticmethod
+    def _is_suffixed(current: str, username: str) -> bool:
+        prefix = User._suffix_prefix(username) + "_"
+        return current.startswith(prefix) and len(current) == len(prefix) + SUFFIX_LENGTH - 1
+
+    @staticmethod
+    def _username_on_conflict(username: str, excluded):
+        """
+        username for an existing row on login: the incoming name when it is
+        free, else the current name if it is already a suffixed form of it
+        (so a taken name doesn't get a fresh suffix on every login), else
+        the suffixed name computed for the insert.
+        """
+        base = username[:USERNAME_MAX_LENGTH]
+        prefix = User._suffix_prefix(username) + "_"
+        already_suffixed = User.username.startswith(prefix, autoescape=True) & \
+            (func.length(User.username) == len(prefix) + SUFFIX_LENGTH - 1)
+        return case(
+            (excluded.username == base, excluded.username),
+            (already_suffixed, User.username),
+            else_=excluded.username
+        )
+
     @staticmethod
     def create_or_update(google_id: str, username: str):
+        """
+        insert the user for `google_id` or return the existing row, in a single
+        INSERT ... ON CONFLICT (google_id) DO UPDATE ... RETURNING statement.
+
+        on conflict the username is brought up to date with `username`, with the
+        same collision suffix as new rows; this replaces a rename made through
+        the profile endpoint. the statement skips the orm flush, so a changed
+        username bumps the user's clubs here. dialects without ON CONFLICT fall
+        back to select-then-insert.
+        """
+        from app.models.versioning import touch_clubs
+        dialect = db.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            insert = postgresql.insert
+        elif dialect == "sqlite":
+            insert = sqlite.insert
+        else:
+            return User._create_or_update_fallback(google_id, username)
+
+        for attempt in range(UPSERT_ATTEMPTS):
+            previous = db.session.execute(
+                db.select(User.username).where(User.google_id == google_id)
+            ).scalar()
+            stmt = insert(User).values(
+                google_id=google_id,
+                username=User._username_expr(google_id, username)
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[User.google_id],
+                set_={"username": User._username_on_conflict(username, stmt.excluded)}
+            ).returning(User)
+
+            try:
+                user = db.session.scalars(
+                    stmt,
+                    execution_options={"populate_existing": True}
+                ).one()
+                if previous is not None and previous != user.username:
+                    touch_clubs(db.session.connection(), user_ids=[user.id])
+                db.session.commit()
+                return user
+            except IntegrityError:
+                # lost a race for the same suffixed username; retry with a new suffix
+                db.session.rollback()
+                if attempt == UPSERT_ATTEMPTS - 1:
+                    raise
+
+    @staticmethod
+    def _create_or_update_fallback(google_id: str, username: str):
+        """ read-then-write path for dialects without ON CONFLICT support """
         user = User.query.filter_by(google_id=google_id).first()
-        if not user:
-            user = User(google_id=google_id, username=username)
-            db.session.add(user)
+
+        candidate = username[:USERNAME_MAX_LENGTH]
+        holder = User.query.filter_by(username=candidate).first()
+        if holder is not None and holder is not user:
+            if user is not None and User._is_suffixed(user.username, username):
+                return user
+            candidate = User._suffix_prefix(username) + "_" + secrets.token_hex(3)
+
+        if user is not None:
+            if user.username != candidate:
+                user.username = candidate
+                db.session.commit()
+            return user
+
+        user = User(google_id=google_id, username=candidate)
+        db.session.add(user)
+        try:
             db.session.commit()
+        except IntegrityError:
+            # concurrent first login created the row; return the winner
+            db.session.rollback()
+            user = User.query.filter_by(google_id=google_id).one()
         return user
 
     def update_username(self, new_username: str) -> None:
@@ -0,0 +1,40 @@
+# app/models/versioning.py
+from datetime import datetime, timezone
+from itertools import chain
+from sqlalchemy import event, inspect, select, update
+from app.replicas import RoutingSession
+from .book import Book
+from .club import Club
+from .club_membership import ClubMembership
+from .user import User
+
+def touch_clubs(connection, club_ids=(), user_ids=()) -> None:
+    """
+    bump clubs.updated_at for the given clubs, and for every club the given
+    users belong to. call directly after bulk statements that skip the orm.
+    """
+    now = datetime.now(timezone.utc)
+    clubs = Club.__table__
+    if club_ids:
+        connection.execute(update(clubs).where(clubs.c.id.in_(club_ids)).values(updated_at=now))
+    if user_ids:
+        memberships = ClubMembership.__table__
+        connection.execute(update(clubs).where(clubs.c.id.in_(
+            select(memberships.c.club_id).where(memberships.c.user_id.in_(user_ids))
+        )).values(updated_at=now))
+
+@event.listens_for(RoutingSession, "after_flush")
+def _touch_clubs_after_flush(session, flush_context):
+    club_ids = set()
+    user_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (ClubMembership, Book)):
+            club_ids.add(obj.club_id)
+        elif isinstance(obj, Club) and obj in session.dirty:
+            club_ids.add(obj.id)
+        elif isinstance(obj, User) and obj in session.dirty \
+                and inspect(obj).attrs.username.history.has_changes():
+            user_ids.add(obj.id)
+
+    if club_ids or user_ids:
+        touch_clubs(session.connection(), club_ids, user_ids)
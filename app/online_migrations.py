@@ -0,0 +1,169 @@
+# app/online_migrations.py
+"""
+alembic helpers for changing large tables without blocking writes.
+
+call these from a migration's upgrade()/downgrade(). on postgres every index
+build and every backfill batch runs in its own autocommit block: the migration
+transaction so far is committed first and no lock is held from one step to the
+next. other databases fall back to plain DDL and single statements.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger("alembic.online")
+
+# rows updated per committed backfill batch
+BACKFILL_BATCH_SIZE = 10000
+# seconds to sleep between backfill batches so replicas and vacuum keep up
+BACKFILL_PAUSE = 0.05
+# seconds between backfill progress lines
+PROGRESS_INTERVAL = 5
+# how long steps that need a brief strong lock may queue before giving up.
+# a queued ACCESS EXCLUSIVE / SHARE request blocks every writer behind it.
+LOCK_TIMEOUT = "5s"
+
+@contextmanager
+def _autocommit(bind, lock_timeout: str = None):
+    with op.get_context().autocommit_block():
+        # index builds on big tables outlast DB_STATEMENT_TIMEOUT_MS
+        bind.execute(sa.text("SET statement_timeout = 0"))
+        if lock_timeout:
+            bind.execute(sa.text(f"SET lock_timeout = '{lock_timeout}'"))
+        try:
+            yield
+        finally:
+            bind.execute(sa.text("RESET statement_timeout"))
+            bind.execute(sa.text("RESET lock_timeout"))
+
+def _partitions(bind, table: str) -> list:
+    """ partitions of `table`, or [] when it isn't partitioned """
+    return bind.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+    ), {"table": table}).scalars().all()
+
+def _index_valid(bind, name: str):
+    """ whether index `name` is valid, or None if it doesn't exist """
+    return bind.execute(sa.text(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+    ), {"name": name}).scalar()
+
+def _build_concurrently(bind, name: str, table: str, columns: str, unique: bool) -> None:
+    valid = _index_valid(bind, name)
+    if valid:
+        return
+    if valid is False:
+        # left behind by a CONCURRENTLY build that failed or was cancelled
+        bind.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    bind.execute(sa.text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY {name} ON {table} ({columns})"
+    ))
+
+def partition_index_name(name: str, partition: str) -> str:
+    return f"{name}__{partition}"[:63]
+
+def create_index_concurrently(name: str, table: str, columns: list, unique: bool = False) -> None:
+    """
+    add an index with CREATE INDEX CONCURRENTLY, which doesn't block writes.
+
+    postgres can't build CONCURRENTLY on a partitioned parent, so there the
+    parent gets an empty index (ON ONLY, invalid), each partition is built
+    concurrently and attached, and the parent index turns valid once the last
+    one is attached. partitions created later get the index automatically.
+    safe to rerun after a failure part way through.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.create_index(name, table, columns, unique=unique)
+        return
+
+    cols = ", ".join(columns)
+    partitions = _partitions(bind, table)
+    if not partitions:
+        started = time.monotonic()
+        with _autocommit(bind):
+            _build_concurrently(bind, name, table, cols, unique)
+        logger.info("%s: built on %s in %.1fs", name, table, time.monotonic() - started)
+        return
+
+    with _autocommit(bind, LOCK_TIMEOUT):
+        bind.execute(sa.text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON ONLY {table} ({cols})"
+        ))
+    for n, partition in enumerate(partitions, 1):
+        child = partition_index_name(name, partition)
+        started = time.monotonic()
+        with _autocommit(bind):
+            _build_concurrently(bind, child, partition, cols, unique)
+        with _autocommit(bind, LOCK_TIMEOUT):
+            # no-op when already attached to this parent
+            bind.execute(sa.text(f"ALTER INDEX {name} ATTACH PARTITION {child}"))
+        logger.info("%s: %s built and attached (%d/%d) in %.1fs",
+                    name, partition, n, len(partitions), time.monotonic() - started)
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    """
+    drop an index without blocking writes. partitioned indexes can't be dropped
+    CONCURRENTLY; dropping one is a catalog change, so it runs under
+    LOCK_TIMEOUT instead of queueing behind long transactions.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.drop_index(name, table_name=table)
+        return
+
+    if _partitions(bind, table):
+        with _autocommit(bind, LOCK_TIMEOUT):
+            bind.execute(sa.text(f"DROP INDEX IF EXISTS {name}"))
+        return
+    with _autocommit(bind):
+        bind.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+def backfill(table: str, assignments: str, where: str = None, key: str = "id",
+             batch_size: int = None, pause: float = None) -> int:
+    """
+    run `UPDATE table SET assignments` in committed batches over ranges of the
+    integer column `key`, sleeping `pause` seconds between batches, so no single
+    transaction holds many row locks or builds a long WAL burst. pass `where`
+    (e.g. "new_col IS NULL") to skip rows already done, which makes a restarted
+    backfill cheap. logs progress every PROGRESS_INTERVAL seconds and returns
+    the number of rows updated.
+    """
+    bind = op.get_bind()
+    batch_size = batch_size or BACKFILL_BATCH_SIZE
+    pause = BACKFILL_PAUSE if pause is None else pause
+
+    lo, hi = bind.execute(sa.text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+    if lo is None:
+        return 0
+
+    update = sa.text(
+        f"UPDATE {table} SET {assignments} WHERE {key} >= :lo AND {key} < :hi"
+        + (f" AND ({where})" if where else "")
+    )
+    postgres = bind.dialect.name == "postgresql"
+    updated = 0
+    started = last_report = time.monotonic()
+    start = lo
+    while start <= hi:
+        end = start + batch_size
+        if postgres:
+            with _autocommit(bind):
+                updated += bind.execute(update, {"lo": start, "hi": end}).rowcount
+        else:
+            updated += bind.execute(update, {"lo": start, "hi": end}).rowcount
+        start = end
+
+        now = time.monotonic()
+        if now - last_report >= PROGRESS_INTERVAL or start > hi:
+            done = min(1.0, (start - lo) / (hi - lo + 1))
+            elapsed = now - started
+            logger.info("backfill %s: %d rows updated, %.0f%% of %s range, %.0fs elapsed, ~%.0fs left",
+                        table, updated, done * 100, key, elapsed, elapsed / done * (1 - done))
+            last_report = now
+        if pause and start <= hi:
+            time.sleep(pause)
+    return updated
@@ -0,0 +1,152 @@
+# app/pool.py
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+from app.metrics.collectors import DB_POOL_CHECKED_OUT, DB_POOL_TIMEOUTS, DB_POOL_WAIT_SECONDS
+
+class PoolStats:
+    """
+    process-wide counters for the db connection pool.
+    updated from pool events, read by the metrics endpoints.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.checkouts_total = 0
+            self.connects_total = 0
+            self.invalidations_total = 0
+            self.timeouts_total = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def on_checkout(self) -> None:
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts_total += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+        DB_POOL_CHECKED_OUT.inc()
+
+    def on_checkin(self) -> None:
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+        DB_POOL_CHECKED_OUT.dec()
+
+    def on_connect(self) -> None:
+        with self._lock:
+            self.connects_total += 1
+
+    def on_invalidate(self) -> None:
+        with self._lock:
+            self.invalidations_total += 1
+
+    def on_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts_total += 1
+        DB_POOL_WAIT_SECONDS.observe(seconds)
+        if timed_out:
+            DB_POOL_TIMEOUTS.inc()
+
+    def snapshot(self, pool=None) -> dict:
+        """ counters plus live pool state (size / overflow) when a pool is given """
+        with self._lock:
+            data = {
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts_total": self.checkouts_total,
+                "connects_total": self.connects_total,
+                "invalidations_total": self.invalidations_total,
+                "timeouts_total": self.timeouts_total,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        data["pool_class"] = type(pool).__name__ if pool is not None else None
+        if isinstance(pool, QueuePool):
+            data["size"] = pool.size()
+            data["checked_in"] = pool.checkedin()
+            data["overflow"] = pool.overflow()
+        return data
+
+pool_stats = PoolStats()
+
+class TimedQueuePool(QueuePool):
+    """ QueuePool that records how long callers wait for a connection """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            pool_stats.on_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.on_wait(time.perf_counter() - start)
+        return conn
+
+def _is_sqlite(uri: str) -> bool:
+    return uri.startswith("sqlite")
+
+def build_engine_options(config) -> dict:
+    """
+    translate DB_* config values into SQLALCHEMY_ENGINE_OPTIONS.
+
+    sqlite keeps flask-sqlalchemy's defaults since its pools don't take sizing args.
+    with DB_PGBOUNCER set, pgbouncer does the pooling: we hold no idle
+    connections and skip startup parameters pgbouncer would reject.
+    """
+    uri = config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if _is_sqlite(uri):
+        return {}
+
+    psycopg3 = make_url(uri).get_dialect().driver == "psycopg"
+
+    if config.get("DB_PGBOUNCER"):
+        # statement_timeout must be set on the role (ALTER ROLE ... SET statement_timeout).
+        # transaction pooling can hand a prepared statement's name to another backend
+        options = {"poolclass": NullPool, "pool_pre_ping": False}
+        if psycopg3:
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+        "pool_use_lifo": True,
+    }
+
+    connect_args = {}
+    statement_timeout = config.get("DB_STATEMENT_TIMEOUT_MS")
+    if statement_timeout and uri.startswith("postgresql"):
+        connect_args["options"] = f"-c statement_timeout={int(statement_timeout)}"
+    if psycopg3:
+        # server-side prepare statements executed this many times on a connection
+        connect_args["prepare_threshold"] = config.get("DB_PREPARE_THRESHOLD", 5)
+    if connect_args:
+        options["connect_args"] = connect_args
+
+    return options
+
+def instrument_engine(engine) -> None:
+    """ attach pool event listeners that feed `pool_stats` """
+    if getattr(engine, "_bindery_instrumented", False):
+        return
+    engine._bindery_instrumented = True
+
+    event.listen(engine, "checkout", lambda *args: pool_stats.on_checkout())
+    event.listen(engine, "checkin", lambda *args: pool_stats.on_checkin())
+    event.listen(engine, "connect", lambda *args: pool_stats.on_connect())
+    event.listen(engine, "invalidate", lambda *args: pool_stats.on_invalidate())
@@ -0,0 +1,210 @@
+# app/profiling.py
+import cProfile
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # optional dependency
+    PyinstrumentProfiler = None
+
+slow_query_log = logging.getLogger("bindery.slow_query")
+n_plus_one_log = logging.getLogger("bindery.n_plus_one")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_sql(statement: str) -> str:
+    """
+    reduce a statement to its shape: literals become ?, IN lists collapse,
+    whitespace is squashed. two queries with the same shape differ only in params.
+    """
+    sql = _STRING_RE.sub("?", statement)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+def n_plus_one_suspects(shapes: Counter, threshold: int) -> list:
+    """
+    (description, executions) for each shape run more than `threshold` times,
+    or, when none is, one entry for all repeated shapes together if they add
+    up to more than `threshold`: a loop doing several lookups per item repeats
+    each shape only once per item.
+    """
+    repeated = {shape: n for shape, n in shapes.items() if n > 1}
+    suspects = [(shape, n) for shape, n in repeated.items() if n > threshold]
+    if suspects:
+        return suspects
+    total = sum(repeated.values())
+    if total > threshold:
+        return [(f"{len(repeated)} repeated statements: " + "; ".join(sorted(repeated)), total)]
+    return []
+
+class RequestProfile:
+    """ per-request sql accounting, stored on flask.g """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, seconds: float) -> str:
+        shape = normalize_sql(statement)
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        self.shapes[shape] += 1
+        return shape
+
+class RequestStats:
+    """ aggregated latency and sql stats keyed by (endpoint, method) """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, endpoint: str, method: str, seconds: float, profile: RequestProfile) -> None:
+        with self._lock:
+            entry = self._stats.setdefault((endpoint, method), {
+                "count": 0,
+                "seconds_total": 0.0,
+                "seconds_max": 0.0,
+                "sql_count_total": 0,
+                "sql_seconds_total": 0.0,
+                "n_plus_one_total": 0,
+            })
+            entry["count"] += 1
+            entry["seconds_total"] += seconds
+            entry["seconds_max"] = max(entry["seconds_max"], seconds)
+            entry["sql_count_total"] += profile.sql_count
+            entry["sql_seconds_total"] += profile.sql_seconds
+
+    def flag_n_plus_one(self, endpoint: str, method: str) -> None:
+        with self._lock:
+            entry = self._stats.get((endpoint, method))
+            if entry:
+                entry["n_plus_one_total"] += 1
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [{
+                "endpoint": endpoint,
+                "method": method,
+                "count": entry["count"],
+                "avg_ms": round(entry["seconds_total"] / entry["count"] * 1000, 3),
+                "max_ms": round(entry["seconds_max"] * 1000, 3),
+                "avg_sql_count": round(entry["sql_count_total"] / entry["count"], 2),
+                "avg_sql_ms": round(entry["sql_seconds_total"] / entry["count"] * 1000, 3),
+                "n_plus_one_total": entry["n_plus_one_total"],
+            } for (endpoint, method), entry in sorted(self._stats.items())]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+request_stats = RequestStats()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # kept on the execution context: a statement that raises never reaches
+    # after_cursor_execute, and a per-connection stack would pair later
+    # timings with its start
+    context._profile_query_start = time.perf_counter()
+
+def _after_cursor_execute(app):
+    slow_seconds = app.config["SLOW_QUERY_MS"] / 1000
+
+    def handler(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_profile_query_start", None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+
+        shape = None
+        if has_request_context() and "profile" in g:
+            shape = g.profile.record(statement, seconds)
+
+        if seconds >= slow_seconds:
+            slow_query_log.warning(
+                "slow query %.1fms: %s", seconds * 1000, shape or normalize_sql(statement)
+            )
+    return handler
+
+def _dumps_allowed(app) -> bool:
+    return app.config["PROFILE_DUMPS_ENABLED"] or app.debug or app.testing
+
+def _start_profiler(app):
+    mode = request.headers.get(app.config["PROFILE_HEADER"])
+    if not mode or not _dumps_allowed(app):
+        return
+    if mode == "pyinstrument" and PyinstrumentProfiler is not None:
+        profiler = PyinstrumentProfiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    g.profiler = profiler
+
+def _stop_profiler(app, response):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return
+
+    os.makedirs(app.config["PROFILE_DIR"], exist_ok=True)
+    name = f"{request.endpoint or 'unknown'}-{request.method.lower()}-{int(time.time() * 1000)}"
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        path = os.path.join(app.config["PROFILE_DIR"], f"{name}.prof")
+        profiler.dump_stats(path)
+    else:
+        profiler.stop()
+        path = os.path.join(app.config["PROFILE_DIR"], f"{name}.html")
+        with open(path, "w") as f:
+            f.write(profiler.output_html())
+    response.headers["X-Profile-Path"] = path
+
+def init_profiling(app, engine) -> None:
+    """
+    opt-in request/query instrumentation (PROFILING_ENABLED):
+    per-endpoint latency and sql counts, N+1 detection, slow query log,
+    and per-request cProfile/pyinstrument dumps via PROFILE_HEADER outside production.
+    """
+    if not app.config["PROFILING_ENABLED"]:
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute(app))
+    threshold = app.config["N_PLUS_ONE_THRESHOLD"]
+
+    @app.before_request
+    def start_request_profile():
+        g.profile = RequestProfile()
+        _start_profiler(app)
+
+    @app.after_request
+    def finish_request_profile(response):
+        profile = g.get("profile")
+        if profile is None:
+            return response
+
+        _stop_profiler(app, response)
+        seconds = time.perf_counter() - profile.started
+        endpoint = request.endpoint or "unknown"
+        request_stats.record(endpoint, request.method, seconds, profile)
+
+        for shape, n in n_plus_one_suspects(profile.shapes, threshold):
+            request_stats.flag_n_plus_one(endpoint, request.method)
+            n_plus_one_log.warning(
+                "possible N+1 in %s %s: %d executions of %s", request.method, endpoint, n, shape
+            )
+
+        response.headers["X-Request-Time-Ms"] = f"{seconds * 1000:.2f}"
+        response.headers["X-SQL-Count"] = str(profile.sql_count)
+        return response
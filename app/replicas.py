@@ -0,0 +1,134 @@
+# app/replicas.py
+import itertools
+import logging
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+
+logger = logging.getLogger("bindery.replicas")
+
+LAG_QUERIES = {
+    "postgresql": text(
+        "SELECT CASE WHEN pg_is_in_recovery() "
+        "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+        "ELSE 0 END"
+    ),
+}
+
+class ReplicaSet:
+    """
+    read replica engines with lag-aware health checks.
+    a replica is used only if its last check succeeded and its replay lag is
+    within `max_lag`. checks run at most once per `check_interval` seconds, in
+    whichever request needs a replica next.
+    """
+
+    def __init__(self, engines: list, max_lag: float, check_interval: float) -> None:
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._healthy = list(engines)
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._cycle = itertools.cycle(range(len(engines)))
+
+    def lag(self, engine) -> float:
+        query = LAG_QUERIES.get(engine.dialect.name)
+        with engine.connect() as conn:
+            if query is None:
+                conn.execute(text("SELECT 1"))
+                return 0.0
+            return float(conn.execute(query).scalar() or 0)
+
+    def check(self) -> None:
+        healthy = []
+        for engine in self.engines:
+            try:
+                lag = self.lag(engine)
+            except Exception as e:
+                logger.warning("replica %s unreachable: %s", engine.url.host or engine.url, e)
+                continue
+            if lag > self.max_lag:
+                logger.warning("replica %s lagging %.1fs", engine.url.host or engine.url, lag)
+                continue
+            healthy.append(engine)
+        self._healthy = healthy
+
+    def choose(self):
+        """ a healthy replica engine, or None to fall back to the primary """
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._checked_at = now
+                self.check()
+            finally:
+                self._lock.release()
+
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._cycle) % len(healthy)]
+
+class RoutingSession(Session):
+    """
+    session that sends reads to a replica inside `read_replica` handlers.
+    flushes, DML and every statement after the session's first write go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            engine = current_app.extensions["replicas"].choose()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause) -> bool:
+        if self._flushing or self.info.get("wrote"):
+            return False
+        if clause is not None and getattr(clause, "is_dml", False):
+            return False
+        if not has_app_context() or not g.get("read_replica"):
+            return False
+        return current_app.extensions.get("replicas") is not None
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_wrote(session, flush_context):
+    # pin the rest of this session to the primary for read-your-writes
+    session.info["wrote"] = True
+
+def read_replica(f):
+    """
+    decorator for read-only handlers: queries may be served by a replica
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.read_replica = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.read_replica = False
+    return decorated
+
+def init_replicas(app, engine_options: dict) -> None:
+    """ build replica engines from DATABASE_REPLICA_URLS; no-op if none are configured """
+    from app.pool import instrument_engine
+
+    uris = app.config["SQLALCHEMY_REPLICA_URIS"]
+    if not uris:
+        app.extensions["replicas"] = None
+        return
+
+    engines = []
+    for uri in uris:
+        engine = create_engine(uri, **engine_options)
+        instrument_engine(engine)
+        engines.append(engine)
+
+    app.extensions["replicas"] = ReplicaSet(
+        engines,
+        max_lag=app.config["REPLICA_MAX_LAG_SECONDS"],
+        check_interval=app.config["REPLICA_CHECK_INTERVAL_SECONDS"]
+    )
@@ -0,0 +1,25 @@
+# app/socket_codec.py
+import logging
+
+try:
+    import msgpack
+except ImportError:  # optional dependency; json frames only without it
+    msgpack = None
+
+logger = logging.getLogger("bindery.sockets")
+
+SERIALIZERS = ("default", "msgpack")
+
+def socket_serializer(app) -> str:
+    """
+    the python-socketio `serializer` for SOCKETIO_SERIALIZER, passed to
+    socketio.init_app. it applies to every connection, so only switch to
+    msgpack once all clients use a msgpack parser.
+    """
+    serializer = app.config["SOCKETIO_SERIALIZER"]
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"SOCKETIO_SERIALIZER must be one of {', '.join(SERIALIZERS)}, not {serializer!r}")
+    if serializer == "msgpack" and msgpack is None:
+        logger.warning("SOCKETIO_SERIALIZER=msgpack but msgpack isn't installed; sending json")
+        return "default"
+    return serializer
@@ -1,11 +1,21 @@
 # app/sockets.py
+import threading
+from contextlib import contextmanager
 from flask import current_app, request
-from flask_socketio import disconnect, join_room, leave_room
+from flask_socketio import ConnectionRefusedError, join_room, leave_room, rooms
 import jwt
 from app.extensions import db, socketio
-from app.models.user import User
+from app.metrics.collectors import (
+    SOCKET_CONNECTIONS,
+    SOCKET_EMITS,
+    SOCKET_ROOMS,
+    SOCKET_ROOM_MEMBERS,
+    SOCKET_ROOM_SIZE,
+)
 from app.models.book import Book
 from app.models.club_membership import ClubMembership
+from app import hot_queries
+from app.messages.mentions import user_room
 
 def authenticate_socket_conn(token: str):
     """
@@ -26,9 +36,128 @@ def emit_error(sid, message, code=400):
     """
     helper to send standardized error messages
     """
+    SOCKET_EMITS.labels("error").inc()
     socketio.emit("error", {"code": code, "message": message}, to=sid)
 
-@socketio.on("connect")
+def room_size(room: str) -> int:
+    """ number of sids in a room on this worker """
+    return len(socketio.server.manager.rooms.get("/", {}).get(room, ()))
+
+def track_room_join(room: str) -> None:
+    size = room_size(room)
+    SOCKET_ROOM_MEMBERS.inc()
+    if size == 1:
+        SOCKET_ROOMS.inc()
+    SOCKET_ROOM_SIZE.observe(size)
+
+def track_room_leave(room: str, remaining: int) -> None:
+    SOCKET_ROOM_MEMBERS.dec()
+    if remaining == 0:
+        SOCKET_ROOMS.dec()
+
+class SessionIndex:
+    """
+    reverse index from (user_id, club_id) to the sids that user has in that
+    club's book rooms, and the rooms each sid joined. lets moderation evict
+    live sessions in O(sessions) instead of scanning every room. per process,
+    like the socket manager's own room table.
+    """
+
+    # club locks are striped: a join only waits on evictions (and joins) that
+    # hash to the same stripe
+    CLUB_LOCK_STRIPES = 64
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._club_locks = [threading.Lock() for _ in range(self.CLUB_LOCK_STRIPES)]
+        self._sessions = {}  # (user_id, club_id) -> {sid: {room, ...}}
+        self._members = {}   # club_id -> {user_id, ...}
+        self._keys = {}      # sid -> {(user_id, club_id), ...}
+
+    @contextmanager
+    def guard(self, club_ids):
+        """
+        hold the locks of these clubs. joins check membership and register
+        inside it and evictions pop inside it, so a ban or kick committed
+        after a join's check still finds and evicts that join's session.
+        """
+        stripes = sorted({club_id % self.CLUB_LOCK_STRIPES for club_id in club_ids})
+        for stripe in stripes:
+            self._club_locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._club_locks[stripe].release()
+
+    def add(self, user_id: int, club_id: int, sid: str, room: str) -> None:
+        with self._lock:
+            self._sessions.setdefault((user_id, club_id), {}).setdefault(sid, set()).add(room)
+            self._members.setdefault(club_id, set()).add(user_id)
+            self._keys.setdefault(sid, set()).add((user_id, club_id))
+
+    def discard_room(self, sid: str, room: str) -> None:
+        """ forget one room for a sid (client left it) """
+        with self._lock:
+            for key in list(self._keys.get(sid, ())):
+                sid_rooms = self._sessions[key][sid]
+                sid_rooms.discard(room)
+                if not sid_rooms:
+                    self._forget(key, sid)
+
+    def discard_sid(self, sid: str) -> None:
+        """ forget everything about a disconnected sid """
+        with self._lock:
+            for key in list(self._keys.get(sid, ())):
+                self._forget(key, sid)
+
+    def pop(self, club_id: int, user_ids=None) -> list:
+        """
+        remove and return (sid, rooms) for the given users in a club, or for
+        every tracked user when `user_ids` is None
+        """
+        with self._lock:
+            if user_ids is None:
+                user_ids = list(self._members.get(club_id, ()))
+            evicted = []
+            for user_id in user_ids:
+                for sid, sid_rooms in list(self._sessions.get((user_id, club_id), {}).items()):
+                    evicted.append((sid, set(sid_rooms)))
+                    self._forget((user_id, club_id), sid)
+            return evicted
+
+    def _forget(self, key: tuple, sid: str) -> None:
+        sids = self._sessions[key]
+        del sids[sid]
+        if not sids:
+            del self._sessions[key]
+            user_id, club_id = key
+            self._members[club_id].discard(user_id)
+            if not self._members[club_id]:
+                del self._members[club_id]
+        keys = self._keys[sid]
+        keys.discard(key)
+        if not keys:
+            del self._keys[sid]
+
+session_index = SessionIndex()
+
+def evict_members(club_id: int, user_ids=None, reason: str = "removed") -> int:
+    """
+    drop users' live sockets out of every book room in a club right away, so a
+    ban or leave stops broadcasts without waiting for the next join check.
+    `user_ids=None` evicts everyone (club deleted). returns sessions evicted.
+    """
+    with session_index.guard([club_id]):
+        evicted = session_index.pop(club_id, user_ids)
+        for sid, sid_rooms in evicted:
+            for room in sid_rooms:
+                socketio.server.leave_room(sid, room, namespace="/")
+                track_room_leave(room, room_size(room))
+                SOCKET_EMITS.labels("left_room").inc()
+                socketio.emit("left_room", {"room": room, "reason": reason}, to=sid)
+    return len(evicted)
+
 def handle_conn():
     """
     handle new WebSocket connection
@@ -38,18 +167,25 @@ def handle_conn():
     if token:
         user_id = authenticate_socket_conn(token)
         if not user_id:
-            emit_error(request.sid, "Missing authentication token", 401)
-            disconnect()
+            # refused connects never reach handle_disconnect, so the gauge stays balanced
+            raise ConnectionRefusedError({"code": 401, "message": "Invalid authentication token"})
+        # personal room for notifications such as @mentions
+        join_room(user_room(user_id))
+    SOCKET_CONNECTIONS.inc()
     print("Socket connected")
 
-@socketio.on("disconnect")
 def handle_disconnect():
     """
     handle a client disconnecting
     """
+    # the sid is still in its rooms here; they are cleared after this handler
+    for room in rooms():
+        if room.startswith("book_"):
+            track_room_leave(room, room_size(room) - 1)
+    session_index.discard_sid(request.sid)
+    SOCKET_CONNECTIONS.dec()
     print("Socket disconnected")
 
-@socketio.on("join_book")
 def handle_join_book(data):
     """
     handle joining a book discussion room
@@ -68,28 +204,86 @@ def handle_join_book(data):
         return
 
     # validate book existence
-    book = Book.query.get(book_id)
+    book = hot_queries.book_by_id(book_id)
     if not book:
         emit_error(sid, "Book not found", 404)
         return
 
-    # check club membership status
-    membership = ClubMembership.query.filter_by(
-        club_id=book.club_id,
-        user_id=user_id,
-        is_banned=False
-    ).first()
+    room = f"book_{book_id}"
+    with session_index.guard([book.club_id]):
+        # check club membership status
+        membership = hot_queries.active_membership(book.club_id, user_id)
+
+        if not membership:
+            emit_error(sid, "Not a member or banned from club", 403)
+            return
+
+        # success
+        if room not in rooms():
+            join_room(room)
+            track_room_join(room)
+        session_index.add(user_id, book.club_id, sid, room)
+    print(f"User {user_id} joined room {room}")
+    SOCKET_EMITS.labels("joined_room").inc()
+    socketio.emit("joined_room", {"room": room}, to=sid)
 
-    if not membership:
-        emit_error(sid, "Not a member or banned from club", 403)
+def handle_join_books(data):
+    """
+    join several book rooms at once, e.g. when a dashboard opens. books are
+    looked up and authorized in two queries whatever their number; the ack
+    lists a status per requested id: joined, not_found or forbidden.
+    """
+    token = data.get("token")
+    book_ids = data.get("book_ids")
+    sid = request.sid
+
+    if not token or not isinstance(book_ids, list) or not book_ids:
+        emit_error(sid, "Missing token or book_ids", 400)
+        return
+    if len(book_ids) > current_app.config["BULK_MAX_ITEMS"]:
+        emit_error(sid, f"At most {current_app.config['BULK_MAX_ITEMS']} books per request", 400)
+        return
+    if not all(isinstance(book_id, int) and not isinstance(book_id, bool) for book_id in book_ids):
+        emit_error(sid, "book_ids must be integers", 400)
+        return
+
+    user_id = authenticate_socket_conn(token)
+    if not user_id:
+        emit_error(sid, "Authentication failed", 401)
         return
 
-    # success
-    join_room(f"book_{book_id}")
-    print(f"User {user_id} joined room book_{book_id}")
-    socketio.emit("joined_room", {"room": f"book_{book_id}"}, to=sid)
+    # book id -> club id
+    clubs = dict(db.session.execute(
+        db.select(Book.id, Book.club_id).where(Book.id.in_(set(book_ids)))
+    ).all())
+
+    joined = set(rooms())
+    results = []
+    with session_index.guard(set(clubs.values())):
+        member_of = set(db.session.execute(
+            db.select(ClubMembership.club_id).where(
+                ClubMembership.user_id == user_id,
+                ClubMembership.club_id.in_(set(clubs.values())),
+                ClubMembership.is_banned == False
+            )
+        ).scalars())
+        for book_id in dict.fromkeys(book_ids):
+            if book_id not in clubs:
+                results.append({"book_id": book_id, "status": "not_found"})
+                continue
+            if clubs[book_id] not in member_of:
+                results.append({"book_id": book_id, "status": "forbidden"})
+                continue
+            room = f"book_{book_id}"
+            if room not in joined:
+                join_room(room)
+                track_room_join(room)
+                joined.add(room)
+            session_index.add(user_id, clubs[book_id], sid, room)
+            results.append({"book_id": book_id, "status": "joined"})
+    print(f"User {user_id} joined {sum(r['status'] == 'joined' for r in results)} book rooms")
+    return {"results": results}
 
-@socketio.on("leave_book")
 def handle_leave_book(data):
     """
     handle leaving a book discussion room
@@ -107,6 +301,19 @@ def handle_leave_book(data):
         emit_error(sid, "Authentication failed", 401)
         return
 
-    leave_room(f"book_{book_id}")
-    print(f"User {user_id} left room book_{book_id}")
-    socketio.emit("left_room", {"room": f"book_{book_id}"}, to=sid)
+    room = f"book_{book_id}"
+    if room in rooms():
+        leave_room(room)
+        track_room_leave(room, room_size(room))
+    session_index.discard_room(sid, room)
+    print(f"User {user_id} left room {room}")
+    SOCKET_EMITS.labels("left_room").inc()
+    socketio.emit("left_room", {"room": room}, to=sid)
+
+def init_socket_handlers(socketio) -> None:
+    """ register socket event handlers; called from create_app """
+    socketio.on_event("connect", handle_conn)
+    socketio.on_event("disconnect", handle_disconnect)
+    socketio.on_event("join_book", handle_join_book)
+    socketio.on_event("join_books", handle_join_books)
+    socketio.on_event("leave_book", handle_leave_book)
@@ -0,0 +1,91 @@
+# benchmarks/broadcast.py
+"""
+cost of one `new_message` broadcast to a large book room, per serializer.
+
+    python -m benchmarks.broadcast                      # 1,000 members
+    python -m benchmarks.broadcast --members 5000 --iterations 500
+
+members are registered straight with the socket manager of a bare
+socketio.Server (no network) and frames are captured at the engine.io layer,
+so this measures encoding and fan-out only. reports cpu time per broadcast,
+distinct encodings, and bytes on the wire (websocket frame payloads) for each
+SOCKETIO_SERIALIZER.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from socketio import Server
+from app.socket_codec import SERIALIZERS, msgpack
+
+ROOM = "book_1"
+
+def wire_bytes(eio_pkt) -> int:
+    # websocket payload: binary frames as-is, text frames with the engine.io type prefix
+    if isinstance(eio_pkt.data, bytes):
+        return len(eio_pkt.data)
+    return len(eio_pkt.encode().encode("utf-8"))
+
+def fill_room(server, members: int) -> list:
+    sids = []
+    for i in range(members):
+        sid = server.manager.connect(f"bench{i}", "/")
+        server.manager.enter_room(sid, "/", ROOM)
+        sids.append(sid)
+    return sids
+
+def run(serializer: str, members: int, iterations: int, content_bytes: int) -> dict:
+    server = Server(serializer=serializer)
+    sent = []
+    server.eio.send_packet = lambda eio_sid, pkt: sent.append(pkt)
+    fill_room(server, members)
+
+    payload = {
+        "id": 123456,
+        "book_id": 1,
+        "user_id": 42,
+        "content": ("lorem ipsum dolor sit amet " * (content_bytes // 27 + 1))[:content_bytes],
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    }
+
+    server.emit("new_message", payload, to=ROOM)  # warm up
+    cpu = []
+    for _ in range(iterations):
+        sent.clear()
+        started = time.process_time()
+        server.emit("new_message", payload, to=ROOM)
+        cpu.append(time.process_time() - started)
+
+    assert len(sent) == members, f"expected {members} frames, got {len(sent)}"
+    return {
+        "cpu_us": sum(cpu) / len(cpu) * 1e6,
+        "encodings": len({id(p) for p in sent}),
+        "frame_bytes": wire_bytes(sent[0]),
+        "wire_bytes": sum(wire_bytes(p) for p in sent),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="socket.io broadcast serializer benchmark")
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--content-bytes", type=int, default=280)
+    args = parser.parse_args(argv)
+
+    serializers = list(SERIALIZERS)
+    if msgpack is None:
+        print("msgpack is not installed; only json is measured")
+        serializers.remove("msgpack")
+
+    print(f"{args.members} members, {args.content_bytes}-byte message, {args.iterations} broadcasts")
+    for serializer in serializers:
+        result = run(serializer, args.members, args.iterations, args.content_bytes)
+        print(
+            f"{serializer:<12} cpu {result['cpu_us']:9.1f}us/broadcast  "
+            f"encodings {result['encodings']:>2}  "
+            f"frame {result['frame_bytes']:>5}B  "
+            f"wire {result['wire_bytes'] / 1024:8.1f}KiB"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# benchmarks/lookups.py
+"""
+per-call cost of the hot single-row lookups: Query API vs app/hot_queries.py.
+
+    python -m benchmarks.lookups
+    BENCH_DATABASE_URL=postgresql+psycopg://... python -m benchmarks.lookups
+
+the identity map is cleared before every call so each one reaches the database.
+against postgres the database is dropped and reseeded; with psycopg 3 the hot
+statements are prepared server-side after DB_PREPARE_THRESHOLD calls.
+"""
+import argparse
+import os
+import sys
+import timeit
+import warnings
+from sqlalchemy.exc import LegacyAPIWarning
+from app import create_app, hot_queries
+from app.config import Config
+from app.extensions import db
+from app.models import Book, Club, ClubMembership
+from benchmarks.seed import seed
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.environ.get("BENCH_DATABASE_URL") or "sqlite://"
+    METRICS_ENABLED = False
+    PROFILING_ENABLED = False
+
+def lookups(unique_id: str, club_id: int, user_id: int, book_id: int) -> list:
+    """ (name, query api, hot statement) pairs returning the same row """
+    return [
+        (
+            "club by unique_id",
+            lambda: Club.query.filter_by(unique_id=unique_id, deleted_at=None).first(),
+            lambda: hot_queries.club_by_unique_id(unique_id),
+        ),
+        (
+            "active membership",
+            lambda: ClubMembership.query.filter_by(club_id=club_id, user_id=user_id, is_banned=False).first(),
+            lambda: hot_queries.active_membership(club_id, user_id),
+        ),
+        (
+            "book by id",
+            lambda: Book.query.get(book_id),
+            lambda: hot_queries.book_by_id(book_id),
+        ),
+    ]
+
+def per_call_us(f, number: int, repeat: int) -> float:
+    def call():
+        db.session.expunge_all()
+        return f()
+    call()
+    return min(timeit.repeat(call, number=number, repeat=repeat)) / number * 1e6
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="hot lookup micro-benchmark")
+    parser.add_argument("--number", type=int, default=2000, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the fastest is reported")
+    args = parser.parse_args(argv)
+    # the request handlers used Query.get() before hot_queries; measure it as it was
+    warnings.simplefilter("ignore", LegacyAPIWarning)
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data = seed(users=50, clubs=5, members_per_club=10, books_per_club=2, messages=0)
+        unique_id = data["club_unique_ids"][0]
+        club_id = 1
+        user_id = data["club_members"][club_id][-1]
+        book_id = next(b for b, c in data["book_club"].items() if c == club_id)
+
+        print(f"{db.engine.dialect.name}+{db.engine.dialect.driver}, {args.number} calls x {args.repeat}")
+        for name, orm, hot in lookups(unique_id, club_id, user_id, book_id):
+            assert orm() is hot(), name
+            orm_us = per_call_us(orm, args.number, args.repeat)
+            hot_us = per_call_us(hot, args.number, args.repeat)
+            print(f"{name:<18} query {orm_us:8.1f}us  hot {hot_us:8.1f}us  {orm_us / hot_us:5.2f}x")
+        db.session.remove()
+        db.drop_all()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
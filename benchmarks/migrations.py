@@ -0,0 +1,210 @@
+# benchmarks/migrations.py
+"""
+run the online index migration against a large seeded postgres database while
+writers keep going, and report how long their writes stalled.
+
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.migrations
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.migrations --messages 5000000 --compare-blocking
+
+the database's public schema is dropped and recreated, migrated to the revision
+before the index migration and seeded with benchmarks/seed.py. then, with
+writer threads inserting messages and touching books and memberships:
+
+  - with --compare-blocking, the same indexes built with plain CREATE INDEX
+  - upgrade to the index migration, downgrade, and upgrade again
+  - a throttled backfill of a scratch column on messages
+
+a phase that blocks writes shows up as a max write latency close to the
+phase's duration.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from flask_migrate import downgrade, stamp, upgrade
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.online_migrations import backfill
+from benchmarks.seed import seed
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+REVISION = "4b7e2d9a6f10"
+PREVIOUS_REVISION = "c37a95d0b6e1"
+# the second migration recreates the users table from the first; a fresh
+# database has to skip it
+INITIAL_REVISION = "e1960433e88f"
+DUPLICATE_REVISION = "bffb4b61f1af"
+
+# (name, table, columns) as in the migration
+INDEXES = [
+    ("ix_club_memberships_user_id", "club_memberships", "user_id"),
+    ("ix_books_club_id_added_at", "books", "club_id, added_at, id"),
+    ("ix_messages_user_id", "messages", "user_id"),
+]
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.environ.get("BENCH_DATABASE_URL")
+    METRICS_ENABLED = False
+    PROFILING_ENABLED = False
+    JOBS_RUN_IN_PROCESS = False
+
+class Writers:
+    """
+    threads doing small write transactions until stopped, timing each one.
+    transactions that fail (deadlocks, lock timeouts) are counted, not retried.
+    """
+
+    def __init__(self, url: str, data: dict, threads: int) -> None:
+        self.engine = create_engine(url, pool_size=threads)
+        self.data = data
+        self.threads = threads
+        self.latencies = []
+        self.errors = 0
+        self._stop = threading.Event()
+        self._workers = []
+
+    def _write(self, rng: random.Random) -> None:
+        book_ids = sorted(self.data["book_club"])
+        with self.engine.connect() as conn:
+            while not self._stop.is_set():
+                book_id = rng.choice(book_ids)
+                club_id = self.data["book_club"][book_id]
+                user_id = rng.choice(self.data["club_members"][club_id])
+                started = time.perf_counter()
+                try:
+                    with conn.begin():
+                        conn.execute(text(
+                            "INSERT INTO messages (book_id, user_id, content, created_at) "
+                            "VALUES (:book_id, :user_id, 'writer', :now)"
+                        ), {"book_id": book_id, "user_id": user_id, "now": datetime.now(timezone.utc).replace(tzinfo=None)})
+                        conn.execute(text("UPDATE books SET title = title WHERE id = :id"), {"id": book_id})
+                        conn.execute(text(
+                            "UPDATE club_memberships SET joined_at = joined_at "
+                            "WHERE club_id = :club_id AND user_id = :user_id"
+                        ), {"club_id": club_id, "user_id": user_id})
+                except DBAPIError:
+                    self.errors += 1
+                self.latencies.append(time.perf_counter() - started)
+
+    def start(self) -> None:
+        self.latencies = []
+        self.errors = 0
+        self._stop.clear()
+        self._workers = [
+            threading.Thread(target=self._write, args=(random.Random(i),), daemon=True)
+            for i in range(self.threads)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self) -> list:
+        self._stop.set()
+        for worker in self._workers:
+            worker.join()
+        return self.latencies
+
+def phase(name: str, writers: Writers, f) -> None:
+    writers.start()
+    time.sleep(0.5)  # let writers settle before the schema change starts
+    started = time.perf_counter()
+    f()
+    elapsed = time.perf_counter() - started
+    latencies = sorted(writers.stop())
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<26} {elapsed:7.2f}s  writes {len(latencies):>6}  "
+        f"p50 {statistics.median(latencies) * 1000:8.2f}ms  "
+        f"p99 {p99 * 1000:8.2f}ms  max {latencies[-1] * 1000:9.2f}ms  failed {writers.errors}"
+    )
+
+def create_indexes_blocking() -> None:
+    # what op.create_index would do: one transaction holding SHARE locks until commit
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text("SET statement_timeout = 0"))
+            for name, table, columns in INDEXES:
+                conn.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+    except DBAPIError as e:
+        print(f"{'':<26} failed: {type(e.orig).__name__}")
+
+def drop_indexes() -> None:
+    with db.engine.begin() as conn:
+        for name, _, _ in INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+def backfill_scratch_column(batch_size: int, pause: float) -> None:
+    with db.engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        with Operations.context(context), context.begin_transaction():
+            rows = backfill("messages", "bench_length = length(content)", where="bench_length IS NULL",
+                            batch_size=batch_size, pause=pause)
+    print(f"{'':<26} backfilled {rows} rows")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="online migration benchmark (postgres)")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--clubs", type=int, default=200)
+    parser.add_argument("--members-per-club", type=int, default=100)
+    parser.add_argument("--books-per-club", type=int, default=5)
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=50000, help="backfill rows per batch")
+    parser.add_argument("--pause", type=float, default=0.05, help="backfill seconds between batches")
+    parser.add_argument("--compare-blocking", action="store_true", help="also time plain CREATE INDEX")
+    args = parser.parse_args(argv)
+
+    url = BenchConfig.SQLALCHEMY_DATABASE_URI
+    if not url or not url.startswith("postgresql"):
+        print("set BENCH_DATABASE_URL to a scratch postgres database; its public schema is dropped")
+        return 2
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA public CASCADE"))
+            conn.execute(text("CREATE SCHEMA public"))
+        upgrade(directory=MIGRATIONS_DIR, revision=INITIAL_REVISION)
+        stamp(directory=MIGRATIONS_DIR, revision=DUPLICATE_REVISION)
+        upgrade(directory=MIGRATIONS_DIR, revision=PREVIOUS_REVISION)
+
+        started = time.perf_counter()
+        data = seed(
+            users=args.users,
+            clubs=args.clubs,
+            members_per_club=args.members_per_club,
+            books_per_club=args.books_per_club,
+            messages=args.messages,
+        )
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        db.session.remove()
+        print(f"seeded {args.messages} messages, {args.clubs * args.members_per_club} memberships "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        writers = Writers(url, data, args.writers)
+        if args.compare_blocking:
+            phase("plain CREATE INDEX", writers, create_indexes_blocking)
+            drop_indexes()
+        phase("upgrade (concurrently)", writers, lambda: upgrade(directory=MIGRATIONS_DIR, revision=REVISION))
+        phase("downgrade", writers, lambda: downgrade(directory=MIGRATIONS_DIR, revision=PREVIOUS_REVISION))
+        phase("upgrade again", writers, lambda: upgrade(directory=MIGRATIONS_DIR, revision=REVISION))
+
+        with db.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE messages ADD COLUMN bench_length integer"))
+        phase("backfill messages", writers, lambda: backfill_scratch_column(args.batch_size, args.pause))
+        with db.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE messages DROP COLUMN bench_length"))
+        writers.engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+# benchmarks/run.py
+"""
+hot-path benchmarks against a real create_app() app.
+
+    python -m benchmarks.run                     # run and compare to baseline.json
+    python -m benchmarks.run --update-baseline   # record a new baseline
+    python -m benchmarks.run --scenario message_history --iterations 500
+
+uses a throwaway sqlite file unless BENCH_DATABASE_URL is set (the database is
+dropped and reseeded). baselines are machine specific: regenerate on the
+reference machine before relying on the comparison.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import jwt
+from app import create_app
+from app.config import Config
+from app.extensions import db, socketio
+from benchmarks.seed import seed
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+class BenchConfig(Config):
+    SECRET_KEY = "bench-secret-key-bench-secret-key"
+    SQLALCHEMY_DATABASE_URI = os.environ.get("BENCH_DATABASE_URL") or \
+        "sqlite:///" + os.path.join(tempfile.gettempdir(), "bindery_bench.db")
+    TESTING = True
+    METRICS_ENABLED = False
+    PROFILING_ENABLED = False
+
+class Bench:
+    """ shared state for scenarios: app, http client, tokens, seeded ids """
+
+    def __init__(self, app, data: dict, rng: random.Random) -> None:
+        self.app = app
+        self.data = data
+        self.rng = rng
+        self.client = app.test_client()
+        self._tokens = {}
+        self._sockets = {}
+
+    def token(self, user_id: int) -> str:
+        if user_id not in self._tokens:
+            self._tokens[user_id] = jwt.encode(
+                {"user_id": user_id}, self.app.config["SECRET_KEY"], algorithm="HS256"
+            )
+        return self._tokens[user_id]
+
+    def headers(self, user_id: int) -> dict:
+        return {"Authorization": f"Bearer {self.token(user_id)}"}
+
+    def socket(self, user_id: int):
+        if user_id not in self._sockets:
+            self._sockets[user_id] = socketio.test_client(
+                self.app, query_string=f"token={self.token(user_id)}"
+            )
+        return self._sockets[user_id]
+
+    def random_book_and_member(self):
+        book_id = self.rng.choice(sorted(self.data["book_club"]))
+        club_id = self.data["book_club"][book_id]
+        return book_id, self.rng.choice(self.data["club_members"][club_id])
+
+    def random_club_and_member(self):
+        club_id = self.rng.randint(1, len(self.data["club_unique_ids"]))
+        unique_id = self.data["club_unique_ids"][club_id - 1]
+        return unique_id, self.rng.choice(self.data["club_members"][club_id])
+
+    def close(self) -> None:
+        for sock in self._sockets.values():
+            if sock.is_connected():
+                sock.disconnect()
+
+def expect(response, status: int):
+    if response.status_code != status:
+        raise RuntimeError(f"expected {status}, got {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+def scenario_message_history(bench: Bench):
+    book_id, user_id = bench.random_book_and_member()
+    expect(bench.client.get(f"/books/{book_id}/messages", headers=bench.headers(user_id)), 200)
+
+def scenario_message_tail(bench: Bench):
+    book_id, user_id = bench.random_book_and_member()
+    expect(bench.client.get(f"/books/{book_id}/messages?limit=50", headers=bench.headers(user_id)), 200)
+
+def scenario_member_list(bench: Bench):
+    unique_id, user_id = bench.random_club_and_member()
+    expect(bench.client.get(f"/clubs/{unique_id}/members", headers=bench.headers(user_id)), 200)
+
+def scenario_club_list(bench: Bench):
+    user_id = bench.rng.randint(1, bench.data["users"])
+    expect(bench.client.get("/clubs", headers=bench.headers(user_id)), 200)
+
+def setup_message_post(bench: Bench, listeners: int = 25):
+    """ join listeners to one hot room so each post pays for a real broadcast """
+    book_id = 1
+    club_id = bench.data["book_club"][book_id]
+    for user_id in bench.data["club_members"][club_id][:listeners]:
+        bench.socket(user_id).emit("join_book", {"token": bench.token(user_id), "book_id": book_id})
+    bench.hot_book = book_id
+
+def scenario_message_post(bench: Bench):
+    book_id = bench.hot_book
+    user_id = bench.rng.choice(bench.data["club_members"][bench.data["book_club"][book_id]])
+    expect(bench.client.post(
+        f"/books/{book_id}/messages",
+        json={"content": "benchmark post"},
+        headers=bench.headers(user_id)
+    ), 201)
+
+def scenario_join_book_storm(bench: Bench):
+    book_id, user_id = bench.random_book_and_member()
+    bench.socket(user_id).emit("join_book", {"token": bench.token(user_id), "book_id": book_id})
+
+SCENARIOS = {
+    "message_history": (None, scenario_message_history),
+    "message_tail": (None, scenario_message_tail),
+    "member_list": (None, scenario_member_list),
+    "club_list": (None, scenario_club_list),
+    "message_post": (setup_message_post, scenario_message_post),
+    "join_book_storm": (None, scenario_join_book_storm),
+}
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def run_scenario(bench: Bench, name: str, iterations: int, warmup: int) -> dict:
+    setup, fn = SCENARIOS[name]
+    if setup:
+        setup(bench)
+    for _ in range(warmup):
+        fn(bench)
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn(bench)
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    # drop queued socket frames so listener buffers don't grow across scenarios
+    for sock in bench._sockets.values():
+        sock.get_received()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "throughput_per_s": round(iterations / elapsed, 1),
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """ list of (scenario, metric, baseline, current) that regressed beyond tolerance """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append((name, metric, previous[metric], current[metric]))
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="bindery hot-path benchmarks")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--clubs", type=int, default=20)
+    parser.add_argument("--members-per-club", type=int, default=50)
+    parser.add_argument("--books-per-club", type=int, default=5)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown vs baseline (0.5 = 50%%)")
+    args = parser.parse_args(argv)
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        data = seed(
+            users=args.users,
+            clubs=args.clubs,
+            members_per_club=args.members_per_club,
+            books_per_club=args.books_per_club,
+            messages=args.messages,
+            seed=args.seed,
+        )
+
+    bench = Bench(app, data, random.Random(args.seed))
+    results = {}
+    try:
+        for name in args.scenario or SCENARIOS:
+            results[name] = run_scenario(bench, name, args.iterations, args.warmup)
+            r = results[name]
+            print(f"{name:<18} p50 {r['p50_ms']:>9.3f}ms  p99 {r['p99_ms']:>9.3f}ms  {r['throughput_per_s']:>9.1f}/s")
+    finally:
+        bench.close()
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline found; run with --update-baseline to record one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, before, after in regressions:
+        print(f"REGRESSION {name} {metric}: {before}ms -> {after}ms")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
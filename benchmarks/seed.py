@@ -0,0 +1,112 @@
+# benchmarks/seed.py
+import random
+import string
+from datetime import datetime, timedelta
+from sqlalchemy import insert, text
+from app.extensions import db
+from app.models import Book, Club, ClubMembership, Message, User
+
+EPOCH = datetime(2025, 1, 1)
+
+def seed(
+    users: int = 200,
+    clubs: int = 20,
+    members_per_club: int = 50,
+    books_per_club: int = 5,
+    messages: int = 20000,
+    seed: int = 42,
+) -> dict:
+    """
+    deterministic bulk seed of users, clubs, memberships, books and messages.
+    rows are built in python and written with executemany inserts, bypassing
+    model __init__ (Club's generates uids with a query per row).
+    returns the ids the scenarios need.
+    """
+    rng = random.Random(seed)
+    members_per_club = min(members_per_club, users)
+
+    db.session.execute(insert(User), [{
+        "id": i,
+        "google_id": f"bench-google-{i}",
+        "username": f"bench_user_{i}",
+        "created_at": EPOCH,
+    } for i in range(1, users + 1)])
+
+    uid_chars = string.ascii_uppercase + string.digits
+    unique_ids = set()
+    while len(unique_ids) < clubs:
+        unique_ids.add("".join(rng.choice(uid_chars) for _ in range(6)))
+    unique_ids = sorted(unique_ids)
+
+    db.session.execute(insert(Club), [{
+        "id": i,
+        "unique_id": unique_ids[i - 1],
+        "creator_id": 1 + (i - 1) % users,
+        "name": f"Bench Club {i}",
+        "created_at": EPOCH,
+    } for i in range(1, clubs + 1)])
+
+    memberships = []
+    club_members = {}
+    for club_id in range(1, clubs + 1):
+        creator_id = 1 + (club_id - 1) % users
+        others = [u for u in range(1, users + 1) if u != creator_id]
+        members = [creator_id] + rng.sample(others, members_per_club - 1)
+        club_members[club_id] = members
+        memberships.extend({
+            "club_id": club_id,
+            "user_id": user_id,
+            "is_banned": False,
+            "joined_at": EPOCH,
+        } for user_id in members)
+    db.session.execute(insert(ClubMembership), memberships)
+
+    books = []
+    book_club = {}
+    for club_id in range(1, clubs + 1):
+        for n in range(books_per_club):
+            book_id = len(books) + 1
+            book_club[book_id] = club_id
+            books.append({
+                "id": book_id,
+                "club_id": club_id,
+                "title": f"Bench Book {book_id}",
+                "author": f"Author {n}",
+                "added_at": EPOCH + timedelta(minutes=book_id),
+            })
+    db.session.execute(insert(Book), books)
+
+    batch = []
+    book_ids = sorted(book_club)
+    for i in range(1, messages + 1):
+        book_id = rng.choice(book_ids)
+        batch.append({
+            "id": i,
+            "book_id": book_id,
+            "user_id": rng.choice(club_members[book_club[book_id]]),
+            "content": f"bench message {i} " + "lorem ipsum " * rng.randint(1, 8),
+            "created_at": EPOCH + timedelta(seconds=i),
+        })
+        if len(batch) == 5000:
+            db.session.execute(insert(Message), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Message), batch)
+
+    if db.session.get_bind().dialect.name == "postgresql":
+        # explicit ids don't advance the serial sequences; later inserts would collide
+        for model in (User, Club, Book, Message):
+            table = model.__tablename__
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+            ))
+
+    db.session.commit()
+
+    return {
+        "users": users,
+        "club_unique_ids": unique_ids,
+        "club_members": club_members,
+        "book_club": book_club,
+    }
@@ -0,0 +1,80 @@
+# benchmarks/startup.py
+"""
+cold-start cost of `create_app()`, measured in fresh interpreters.
+
+    python -m benchmarks.startup              # summary + 15 slowest imports
+    python -m benchmarks.startup --runs 10 --top 30
+
+each run spawns `python -X importtime` so nothing is cached in-process.
+reports wall time for import + create_app, and the modules with the largest
+cumulative import time. also lists heavy modules that should stay lazy.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# modules that should not be imported until first use
+LAZY_MODULES = ("google.oauth2", "google.auth.transport.requests")
+
+PROBE = """
+import sys, time
+t0 = time.perf_counter()
+from app import create_app
+create_app()
+print("wall_ms=%.3f" % ((time.perf_counter() - t0) * 1000))
+print("eager=" + ",".join(m for m in {lazy!r} if m in sys.modules))
+"""
+
+def run_once(env: dict):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(lazy=LAZY_MODULES)],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    imports = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = int(cumulative_us)
+
+    values = dict(line.split("=", 1) for line in proc.stdout.splitlines() if "=" in line)
+    eager = [m for m in values.get("eager", "").split(",") if m]
+    return float(values["wall_ms"]), imports, eager
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="create_app cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    # sqlite keeps the probe independent of a running database / installed driver
+    env = dict(os.environ, DATABASE_URL=os.environ.get("BENCH_DATABASE_URL", "sqlite://"))
+
+    walls = []
+    imports = {}
+    eager = []
+    for _ in range(args.runs):
+        wall_ms, imports, eager = run_once(env)
+        walls.append(wall_ms)
+
+    print(f"create_app cold start over {args.runs} runs: "
+          f"median {statistics.median(walls):.1f}ms, min {min(walls):.1f}ms, max {max(walls):.1f}ms")
+    print("\nslowest imports (cumulative, last run):")
+    for name, cumulative_us in sorted(imports.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:>9.1f}ms  {name}")
+
+    if eager:
+        print(f"\nWARNING: expected-lazy modules imported at startup: {', '.join(eager)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
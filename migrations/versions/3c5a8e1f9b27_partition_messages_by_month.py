@@ -0,0 +1,136 @@
+"""partition messages by month
+
+Revision ID: 3c5a8e1f9b27
+Revises: f4f49e1d6de1
+Create Date: 2025-02-03 19:42:10.118204
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c5a8e1f9b27'
+down_revision = 'f4f49e1d6de1'
+branch_labels = None
+depends_on = None
+
+# rows copied per committed batch while the old table stays writable
+CHUNK_SIZE = 50000
+# empty monthly partitions created past the current month
+MONTHS_AHEAD = 3
+
+
+def _add_months(dt, months):
+    index = dt.year * 12 + dt.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _copy_in_chunks(bind, source, target, start_id, end_id):
+    lo = start_id
+    while lo < end_id:
+        hi = min(lo + CHUNK_SIZE, end_id)
+        with op.get_context().autocommit_block():
+            bind.execute(sa.text(
+                f"INSERT INTO {target} (id, book_id, user_id, content, created_at) "
+                f"SELECT id, book_id, user_id, content, created_at FROM {source} "
+                f"WHERE id > :lo AND id <= :hi"
+            ), {"lo": lo, "hi": hi})
+        lo = hi
+
+
+def upgrade():
+    op.create_table('message_archives',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('range_start', sa.DateTime(), nullable=False),
+    sa.Column('range_end', sa.DateTime(), nullable=False),
+    sa.Column('path', sa.String(length=1024), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('range_start')
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # no declarative partitioning; keep a plain table with the paging index
+        op.create_index('ix_messages_book_id_id', 'messages', ['book_id', 'id'])
+        return
+
+    # the partition key has to be part of the primary key
+    op.execute("""
+        CREATE TABLE messages_partitioned (
+            id INTEGER NOT NULL DEFAULT nextval('messages_id_seq'),
+            book_id INTEGER NOT NULL REFERENCES books (id),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            content TEXT NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE INDEX ix_messages_book_id_id ON messages_partitioned (book_id, id)")
+
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM messages")).scalar()
+    now = datetime.utcnow()
+    lo = datetime((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(datetime(now.year, now.month, 1), MONTHS_AHEAD)
+    while lo <= last:
+        hi = _add_months(lo, 1)
+        op.execute(
+            f"CREATE TABLE messages_y{lo.year}m{lo.month:02d} PARTITION OF messages_partitioned "
+            f"FOR VALUES FROM ('{lo:%Y-%m-%d}') TO ('{hi:%Y-%m-%d}')"
+        )
+        lo = hi
+    op.execute("CREATE TABLE messages_default PARTITION OF messages_partitioned DEFAULT")
+
+    # bulk copy in committed chunks; the old table keeps taking writes meanwhile
+    copied_to = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM messages")).scalar()
+    _copy_in_chunks(bind, 'messages', 'messages_partitioned', 0, copied_to)
+
+    # short exclusive section: catch up rows written during the copy, then swap names.
+    # EXCLUSIVE mode blocks writers but not readers.
+    op.execute("LOCK TABLE messages IN EXCLUSIVE MODE")
+    bind.execute(sa.text(
+        "INSERT INTO messages_partitioned (id, book_id, user_id, content, created_at) "
+        "SELECT id, book_id, user_id, content, created_at FROM messages WHERE id > :lo"
+    ), {"lo": copied_to})
+    op.execute("ALTER TABLE messages RENAME TO messages_unpartitioned")
+    op.execute("ALTER TABLE messages_partitioned RENAME TO messages")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+    op.execute("DROP TABLE messages_unpartitioned")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        op.drop_index('ix_messages_book_id_id', table_name='messages')
+        op.drop_table('message_archives')
+        return
+
+    # archived months are not restored; re-import them from MESSAGE_ARCHIVE_DIR if needed
+    op.execute("""
+        CREATE TABLE messages_unpartitioned (
+            id INTEGER NOT NULL DEFAULT nextval('messages_id_seq'),
+            book_id INTEGER NOT NULL REFERENCES books (id),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            content TEXT NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id)
+        )
+    """)
+    copied_to = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM messages")).scalar()
+    _copy_in_chunks(bind, 'messages', 'messages_unpartitioned', 0, copied_to)
+
+    op.execute("LOCK TABLE messages IN EXCLUSIVE MODE")
+    bind.execute(sa.text(
+        "INSERT INTO messages_unpartitioned (id, book_id, user_id, content, created_at) "
+        "SELECT id, book_id, user_id, content, created_at FROM messages WHERE id > :lo"
+    ), {"lo": copied_to})
+    op.execute("ALTER TABLE messages RENAME TO messages_partitioned")
+    op.execute("ALTER TABLE messages_unpartitioned RENAME TO messages")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+    op.execute("DROP TABLE messages_partitioned")
+    op.execute("ALTER TABLE messages RENAME CONSTRAINT messages_unpartitioned_pkey TO messages_pkey")
+
+    op.drop_table('message_archives')
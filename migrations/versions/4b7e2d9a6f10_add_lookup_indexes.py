@@ -0,0 +1,32 @@
+"""add lookup indexes
+
+Revision ID: 4b7e2d9a6f10
+Revises: c37a95d0b6e1
+Create Date: 2025-03-04 10:21:37.604118
+
+"""
+from alembic import op
+from app.online_migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2d9a6f10'
+down_revision = 'c37a95d0b6e1'
+branch_labels = None
+depends_on = None
+
+
+# built CONCURRENTLY so the tables keep taking writes; see app/online_migrations.py
+def upgrade():
+    # clubs a user belongs to (club list, feed, mentions)
+    create_index_concurrently('ix_club_memberships_user_id', 'club_memberships', ['user_id'])
+    # a club's book list in display order, and purge_club
+    create_index_concurrently('ix_books_club_id_added_at', 'books', ['club_id', 'added_at', 'id'])
+    # foreign key checks when users are deleted; one build per messages partition
+    create_index_concurrently('ix_messages_user_id', 'messages', ['user_id'])
+
+
+def downgrade():
+    drop_index_concurrently('ix_messages_user_id', 'messages')
+    drop_index_concurrently('ix_books_club_id_added_at', 'books')
+    drop_index_concurrently('ix_club_memberships_user_id', 'club_memberships')
@@ -0,0 +1,37 @@
+"""add message mentions
+
+Revision ID: 5e8f2a7c4d19
+Revises: a81f0c6d2e94
+Create Date: 2025-02-20 17:05:33.461872
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8f2a7c4d19'
+down_revision = 'a81f0c6d2e94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('message_mentions',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('message_id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'message_id')
+    )
+    with op.batch_alter_table('message_mentions', schema=None) as batch_op:
+        batch_op.create_index('ix_message_mentions_message_id', ['message_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('message_mentions', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_mentions_message_id')
+
+    op.drop_table('message_mentions')
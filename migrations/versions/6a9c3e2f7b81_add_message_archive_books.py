@@ -0,0 +1,38 @@
+"""add message archive books
+
+Revision ID: 6a9c3e2f7b81
+Revises: 4b7e2d9a6f10
+Create Date: 2025-03-11 09:42:15.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a9c3e2f7b81'
+down_revision = '4b7e2d9a6f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('message_archive_books',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('archive_id', sa.Integer(), nullable=False),
+    sa.Column('min_id', sa.Integer(), nullable=False),
+    sa.Column('max_id', sa.Integer(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['archive_id'], ['message_archives.id'], ),
+    sa.PrimaryKeyConstraint('book_id', 'archive_id')
+    )
+    # existing archives are read for every book until `flask messages index-archives` runs
+    with op.batch_alter_table('message_archives', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('books_indexed', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('message_archives', schema=None) as batch_op:
+        batch_op.drop_column('books_indexed')
+
+    op.drop_table('message_archive_books')
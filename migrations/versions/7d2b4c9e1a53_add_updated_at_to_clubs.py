@@ -0,0 +1,28 @@
+"""add updated_at to clubs
+
+Revision ID: 7d2b4c9e1a53
+Revises: 3c5a8e1f9b27
+Create Date: 2025-02-09 16:05:32.640118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2b4c9e1a53'
+down_revision = '3c5a8e1f9b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('clubs', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now())
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('clubs', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,27 @@
+"""add feed_fanout_from to clubs
+
+Revision ID: 8c1d5f3a9e62
+Revises: 6a9c3e2f7b81
+Create Date: 2025-03-18 11:27:04.915362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1d5f3a9e62'
+down_revision = '6a9c3e2f7b81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # null merges every club at read time until its next post, which is always correct
+    with op.batch_alter_table('clubs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('feed_fanout_from', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('clubs', schema=None) as batch_op:
+        batch_op.drop_column('feed_fanout_from')
@@ -0,0 +1,39 @@
+"""add feed entries
+
+Revision ID: 9b4d61e7c2a8
+Revises: 5e8f2a7c4d19
+Create Date: 2025-02-24 10:31:02.774519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4d61e7c2a8'
+down_revision = '5e8f2a7c4d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('feed_entries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('message_id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('club_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.ForeignKeyConstraint(['club_id'], ['clubs.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'message_id')
+    )
+    with op.batch_alter_table('feed_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_feed_entries_club_id', ['club_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('feed_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_feed_entries_club_id')
+
+    op.drop_table('feed_entries')
@@ -0,0 +1,40 @@
+"""add message client ids
+
+Revision ID: c37a95d0b6e1
+Revises: 9b4d61e7c2a8
+Create Date: 2025-02-27 15:12:48.230917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c37a95d0b6e1'
+down_revision = '9b4d61e7c2a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('message_client_ids',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.String(length=64), nullable=False),
+    sa.Column('message_id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'client_id')
+    )
+    with op.batch_alter_table('message_client_ids', schema=None) as batch_op:
+        batch_op.create_index('ix_message_client_ids_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_message_client_ids_message_id', ['message_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('message_client_ids', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_client_ids_message_id')
+        batch_op.drop_index('ix_message_client_ids_created_at')
+
+    op.drop_table('message_client_ids')
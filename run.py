@@ -1,7 +1,6 @@
 # run.py
 from app import create_app
 from app.extensions import socketio
-import app.sockets
 
 app = create_app()
 
@@ -0,0 +1,88 @@
+# tests/conftest.py
+"""
+one app per test session (flask-restful's global `api` can't be bound twice),
+backed by a primary and a replica database. both are sqlite files by default;
+set TEST_DATABASE_URL and TEST_REPLICA_DATABASE_URL to scratch postgres
+databases to run against postgres. tables are recreated for every test.
+"""
+import os
+import jwt
+import pytest
+from sqlalchemy import MetaData
+from app import create_app
+from app.config import Config
+from app.extensions import db, socketio
+
+class TestConfig(Config):
+    TESTING = True
+    SECRET_KEY = "test-secret-key-test-secret-key!"
+    METRICS_ENABLED = False
+    # on for tests/test_profiling.py; per-request profiles don't change responses
+    PROFILING_ENABLED = True
+    JOBS_RUN_IN_PROCESS = False
+    # checks are driven by the tests
+    REPLICA_CHECK_INTERVAL_SECONDS = 3600
+
+def drop_everything(engine) -> None:
+    """ drop every table, including ones created by migrations outside the models """
+    metadata = MetaData()
+    metadata.reflect(engine)
+    metadata.drop_all(engine)
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    base = tmp_path_factory.mktemp("db")
+    TestConfig.SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{base / 'primary.db'}"
+    TestConfig.SQLALCHEMY_REPLICA_URIS = [
+        os.environ.get("TEST_REPLICA_DATABASE_URL") or f"sqlite:///{base / 'replica.db'}"
+    ]
+    app = create_app(TestConfig)
+    with app.app_context():
+        drop_everything(db.engine)
+    for engine in app.extensions["replicas"].engines:
+        drop_everything(engine)
+    return app
+
+@pytest.fixture
+def replica_engine(app):
+    return app.extensions["replicas"].engines[0]
+
+@pytest.fixture(autouse=True)
+def tables(app, replica_engine):
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(replica_engine)
+    yield
+    # client requests reuse the app context pytest-flask pushes for the test
+    db.session.remove()
+    with app.app_context():
+        drop_everything(db.engine)
+        drop_everything(replica_engine)
+
+@pytest.fixture
+def primary_only(app, monkeypatch):
+    """ route reads to the primary and skip the in-memory message buffer """
+    monkeypatch.setattr(app.extensions["replicas"], "choose", lambda: None)
+    monkeypatch.setitem(app.extensions, "recent_messages", None)
+
+@pytest.fixture
+def socket_client(app):
+    """ connect socket.io test clients as users; all are disconnected afterwards """
+    clients = []
+    def connect(user_id: int):
+        token = jwt.encode({"user_id": user_id}, app.config["SECRET_KEY"], algorithm="HS256")
+        sock = socketio.test_client(app, query_string=f"token={token}")
+        sock.token = token
+        clients.append(sock)
+        return sock
+    yield connect
+    for sock in clients:
+        if sock.is_connected():
+            sock.disconnect()
+
+@pytest.fixture
+def auth_headers(app):
+    def make(user_id: int) -> dict:
+        token = jwt.encode({"user_id": user_id}, app.config["SECRET_KEY"], algorithm="HS256")
+        return {"Authorization": f"Bearer {token}"}
+    return make
@@ -0,0 +1,149 @@
+# tests/test_archive.py
+from datetime import datetime
+import pytest
+from sqlalchemy import insert
+from app.extensions import db
+from app.jobs.tasks import purge_club
+from app.messages import archive
+from app.messages.archive import archived_messages
+from app.messages.partitions import archive_month, index_archives
+from app.models import (
+    Book, Club, ClubMembership, FeedEntry, Message, MessageArchive, MessageArchiveBook,
+    MessageClientId, MessageMention, User
+)
+
+JAN = datetime(2024, 1, 1)
+FEB = datetime(2024, 2, 1)
+
+@pytest.fixture
+def books(app):
+    """ books 1 and 2 added in january, 3 in march; 1 has messages in january and february, 2 only january """
+    db.session.execute(insert(User), [{"google_id": "g1", "username": "alice", "created_at": JAN}])
+    db.session.execute(insert(Club), [{
+        "unique_id": "ABC123", "creator_id": 1, "name": "club", "created_at": JAN, "updated_at": JAN
+    }])
+    db.session.execute(insert(ClubMembership), [{"club_id": 1, "user_id": 1, "is_banned": False, "joined_at": JAN}])
+    db.session.execute(insert(Book), [
+        {"club_id": 1, "title": "one", "author": "a", "added_at": JAN},
+        {"club_id": 1, "title": "two", "author": "a", "added_at": JAN},
+        {"club_id": 1, "title": "three", "author": "a", "added_at": datetime(2024, 3, 15)},
+    ])
+    db.session.execute(insert(Message), [
+        {"book_id": book_id, "user_id": 1, "content": f"{book_id} {month:%b}", "created_at": month.replace(day=day)}
+        for month, book_ids in ((JAN, (1, 2)), (FEB, (1,)))
+        for day in (2, 3)
+        for book_id in book_ids
+    ])
+    db.session.commit()
+    return {book.title: book for book in Book.query.order_by(Book.id)}
+
+@pytest.fixture
+def archived(books, tmp_path):
+    return [archive_month(JAN, str(tmp_path)), archive_month(FEB, str(tmp_path))]
+
+@pytest.fixture
+def opened(monkeypatch):
+    """ paths of the archive files read, in order """
+    paths = []
+    read_archive = archive.read_archive
+    def spy(path, *args, **kwargs):
+        paths.append(path)
+        return read_archive(path, *args, **kwargs)
+    monkeypatch.setattr(archive, "read_archive", spy)
+    return paths
+
+def contents(messages) -> list:
+    return [m["content"] for m in messages]
+
+def test_archive_records_the_books_it_holds(archived):
+    jan, feb = archived
+    rows = {(r.archive_id, r.book_id): r.row_count for r in MessageArchiveBook.query}
+    assert rows == {(jan.id, 1): 2, (jan.id, 2): 2, (feb.id, 1): 2}
+    assert all(a.books_indexed for a in archived)
+
+def test_reads_only_archives_holding_the_book(books, archived, opened):
+    jan, feb = archived
+    assert contents(archived_messages(books["two"])) == ["2 Jan", "2 Jan"]
+    assert opened == [jan.path]
+
+def test_skips_archives_with_no_rows_before_the_cursor(books, archived, opened):
+    jan, feb = archived
+    first_feb = min(m["id"] for m in archive.read_archive(feb.path, 1))
+    opened.clear()
+    assert contents(archived_messages(books["one"], before_id=first_feb)) == ["1 Jan", "1 Jan"]
+    assert opened == [jan.path]
+
+def test_book_without_archived_messages_opens_nothing(books, archived, opened):
+    assert archived_messages(books["three"]) == []
+    assert opened == []
+
+def test_unindexed_archives_are_read_until_indexed(books, archived, opened):
+    jan, feb = archived
+    MessageArchiveBook.query.delete()
+    MessageArchive.query.update({"books_indexed": False})
+    db.session.commit()
+
+    # added after both archives end
+    assert archived_messages(books["three"]) == []
+    assert opened == []
+    assert contents(archived_messages(books["two"])) == ["2 Jan", "2 Jan"]
+    assert opened == [feb.path, jan.path]
+
+    assert [a.id for a in index_archives()] == [jan.id, feb.id]
+    opened.clear()
+    assert contents(archived_messages(books["two"])) == ["2 Jan", "2 Jan"]
+    assert opened == [jan.path]
+
+def test_archiving_a_month_drops_its_mentions_feed_entries_and_client_ids(books, tmp_path):
+    messages = Message.query.order_by(Message.id).all()
+    for m in messages:
+        db.session.add(MessageMention(user_id=1, message_id=m.id, book_id=m.book_id, created_at=m.created_at))
+        db.session.add(FeedEntry(user_id=1, message_id=m.id, book_id=m.book_id, club_id=1, created_at=m.created_at))
+        db.session.add(MessageClientId(user_id=1, client_id=f"c{m.id}", message_id=m.id,
+                                       book_id=m.book_id, created_at=m.created_at))
+    feb_ids = sorted(m.id for m in messages if m.created_at >= FEB)
+    db.session.commit()
+
+    archive_month(JAN, str(tmp_path))
+
+    for model in (MessageMention, FeedEntry, MessageClientId):
+        assert sorted(r.message_id for r in model.query) == feb_ids, model.__name__
+
+def test_purging_a_club_with_archived_messages(books, tmp_path):
+    jan_ids = [m.id for m in Message.query.filter(Message.created_at < FEB)]
+    archive_month(JAN, str(tmp_path))
+    # left behind by an archive taken before archive_month dropped dependent rows
+    for message_id in jan_ids:
+        db.session.add(MessageMention(user_id=1, message_id=message_id, book_id=1, created_at=JAN))
+        db.session.add(FeedEntry(user_id=1, message_id=message_id, book_id=1, club_id=1, created_at=JAN))
+        db.session.add(MessageClientId(user_id=1, client_id=f"c{message_id}", message_id=message_id,
+                                       book_id=1, created_at=JAN))
+    db.session.commit()
+
+    assert purge_club({"club_id": 1}) == {"club_id": 1, "messages": 2}
+    for model in (MessageMention, FeedEntry, MessageClientId, Message, Book, ClubMembership, Club):
+        assert model.query.count() == 0, model.__name__
+
+def test_unpaged_history_reads_only_the_database(client, auth_headers, books, tmp_path, opened, primary_only):
+    jan = archive_month(JAN, str(tmp_path))
+
+    response = client.get("/books/1/messages", headers=auth_headers(1))
+    assert contents(response.json) == ["1 Feb", "1 Feb"]
+    assert opened == []
+
+    # a full page stops at the database
+    response = client.get("/books/1/messages?limit=2", headers=auth_headers(1))
+    assert contents(response.json) == ["1 Feb", "1 Feb"]
+    assert opened == []
+
+    # a page running past the oldest database row is topped up from the archive
+    response = client.get("/books/1/messages?limit=3", headers=auth_headers(1))
+    assert contents(response.json) == ["1 Jan", "1 Feb", "1 Feb"]
+    assert opened == [jan.path]
+
+def test_unpaged_history_is_ordered_by_id(client, auth_headers, books, primary_only):
+    # an id handed out before a commit that lands with an earlier timestamp
+    db.session.execute(insert(Message), [{"book_id": 1, "user_id": 1, "content": "late", "created_at": JAN}])
+    db.session.commit()
+    ids = [m["id"] for m in client.get("/books/1/messages", headers=auth_headers(1)).json]
+    assert ids == sorted(ids)
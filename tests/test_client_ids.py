@@ -0,0 +1,80 @@
+# tests/test_client_ids.py
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import Book, Club, ClubMembership, Message, MessageClientId, User
+
+NOW = datetime(2025, 1, 1)
+
+@pytest.fixture
+def books(app):
+    """ alice (1) is a member of club 1 with books 1 and 2 """
+    db.session.execute(insert(User), [{"google_id": "g1", "username": "alice", "created_at": NOW}])
+    db.session.execute(insert(Club), [{
+        "unique_id": "ABC123", "creator_id": 1, "name": "club", "created_at": NOW, "updated_at": NOW
+    }])
+    db.session.execute(insert(ClubMembership), [{"club_id": 1, "user_id": 1, "is_banned": False, "joined_at": NOW}])
+    db.session.execute(insert(Book), [
+        {"club_id": 1, "title": title, "author": "a", "added_at": NOW} for title in ("one", "two")
+    ])
+    db.session.commit()
+
+@pytest.fixture
+def post(client, auth_headers):
+    def send(book_id: int, content: str = "hi", **kwargs):
+        headers = {**auth_headers(1), **kwargs.pop("headers", {})}
+        return client.post(f"/books/{book_id}/messages", json={"content": content, **kwargs}, headers=headers)
+    return send
+
+def test_a_repeated_client_id_returns_the_original(books, post):
+    first = post(1, client_id="c1")
+    assert first.status_code == 201
+    assert first.json["client_id"] == "c1"
+
+    retry = post(1, "retried", client_id="c1")
+    assert retry.status_code == 200
+    assert (retry.json["id"], retry.json["content"]) == (first.json["id"], "hi")
+    assert Message.query.count() == 1
+
+def test_idempotency_key_header_works_like_client_id(books, post):
+    first = post(1, headers={"Idempotency-Key": "k1"})
+    retry = post(1, client_id="k1")
+    assert (first.status_code, retry.status_code) == (201, 200)
+    assert retry.json["id"] == first.json["id"]
+
+def test_a_client_id_used_on_another_book_conflicts(books, post):
+    assert post(1, client_id="c1").status_code == 201
+    response = post(2, client_id="c1")
+    assert response.status_code == 409
+    assert Message.query.count() == 1
+
+@pytest.mark.parametrize("client_id", ["", "x" * (MessageClientId.MAX_LENGTH + 1)])
+def test_client_id_length_is_checked(books, post, client_id):
+    assert post(1, client_id=client_id).status_code == 400
+
+def test_claim_loses_to_an_existing_claim(books):
+    first, second = Message(book_id=1, user_id=1, content="a"), Message(book_id=1, user_id=1, content="b")
+    db.session.add_all([first, second])
+    db.session.flush()
+
+    assert MessageClientId.claim("c1", first) is True
+    assert MessageClientId.claim("c1", second) is False
+    assert MessageClientId.original(1, "c1").id == first.id
+
+def test_prune_client_ids_drops_ids_past_the_retry_window(app, books):
+    now = datetime.utcnow()
+    for client_id, created_at in (("old", now - timedelta(hours=49)), ("new", now - timedelta(hours=1))):
+        message = Message(book_id=1, user_id=1, content=client_id)
+        message.created_at = created_at
+        db.session.add(message)
+        db.session.flush()
+        MessageClientId.claim(client_id, message)
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["messages", "prune-client-ids"])
+    assert result.output.strip() == "pruned 1 client ids older than 48h"
+    assert [r.client_id for r in MessageClientId.query] == ["new"]
+
+    result = app.test_cli_runner().invoke(args=["messages", "prune-client-ids", "--older-than-hours", "0"])
+    assert result.output.strip() == "pruned 1 client ids older than 0h"
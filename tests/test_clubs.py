@@ -0,0 +1,97 @@
+# tests/test_clubs.py
+from datetime import datetime
+import pytest
+from sqlalchemy import insert
+from app.extensions import db
+from app.jobs.tasks import purge_club
+from app.jobs.worker import Worker
+from app.models import Book, Club, ClubMembership, FeedEntry, Job, Message, MessageClientId, MessageMention, User
+from app.sockets import room_size
+
+NOW = datetime(2025, 1, 1)
+
+@pytest.fixture
+def club(app, primary_only):
+    """ club ABC123 created by alice (user 1), with bob (user 2) as a member """
+    User.create_or_update("g1", "alice")
+    User.create_or_update("g2", "bob")
+    db.session.execute(insert(Club), [{
+        "unique_id": "ABC123", "creator_id": 1, "name": "club", "created_at": NOW, "updated_at": NOW
+    }])
+    db.session.execute(insert(ClubMembership), [
+        {"club_id": 1, "user_id": user_id, "is_banned": False, "joined_at": NOW} for user_id in (1, 2)
+    ])
+    db.session.execute(insert(Book), [{"club_id": 1, "title": "book", "author": "a", "added_at": NOW}])
+    db.session.commit()
+    return db.session.get(Club, 1)
+
+def member_names(response) -> list:
+    return sorted(m["username"] for m in response.json["members"])
+
+def test_login_rename_invalidates_member_list_etag(client, auth_headers, club):
+    first = client.get("/clubs/ABC123/members", headers=auth_headers(1))
+    etag = first.headers["ETag"]
+    assert client.get("/clubs/ABC123/members", headers={**auth_headers(1), "If-None-Match": etag}).status_code == 304
+
+    User.create_or_update("g2", "robert")
+
+    response = client.get("/clubs/ABC123/members", headers={**auth_headers(1), "If-None-Match": etag})
+    assert response.status_code == 200
+    assert member_names(response) == ["alice", "robert"]
+
+def test_login_without_rename_keeps_the_etag(client, auth_headers, club):
+    etag = client.get("/clubs/ABC123/members", headers=auth_headers(1)).headers["ETag"]
+    User.create_or_update("g2", "bob")
+    assert client.get("/clubs/ABC123/members", headers={**auth_headers(1), "If-None-Match": etag}).status_code == 304
+
+def events(sock, name: str) -> list:
+    return [e["args"][0] for e in sock.get_received() if e["name"] == name]
+
+def test_bulk_ban_evicts_sockets_and_bumps_the_etag(client, auth_headers, club, socket_client):
+    alice, bob = socket_client(1), socket_client(2)
+    for sock in (alice, bob):
+        sock.emit("join_book", {"token": sock.token, "book_id": 1})
+        assert events(sock, "joined_room") == [{"room": "book_1"}]
+    assert room_size("book_1") == 2
+    etag = client.get("/clubs/ABC123", headers=auth_headers(1)).headers["ETag"]
+
+    response = client.post("/clubs/ABC123/members/bulk", json={"action": "ban", "user_ids": [2, 1, 99]},
+                           headers=auth_headers(1))
+    assert response.status_code == 200
+    assert response.json["results"] == [
+        {"user_id": 2, "status": "banned"},
+        {"user_id": 1, "status": "skipped_creator"},
+        {"user_id": 99, "status": "not_found"},
+    ]
+
+    assert events(bob, "left_room") == [{"room": "book_1", "reason": "banned"}]
+    assert events(alice, "left_room") == []
+    assert room_size("book_1") == 1
+    assert client.get("/clubs/ABC123", headers={**auth_headers(1), "If-None-Match": etag}).status_code == 200
+
+    # and the banned user can't come back in
+    bob.emit("join_book", {"token": bob.token, "book_id": 1})
+    assert events(bob, "error")[0]["code"] == 403
+    assert room_size("book_1") == 1
+
+def test_deleted_club_is_gone_and_purged_once(app, client, auth_headers, club):
+    posted = client.post("/books/1/messages", json={"content": "hi @bob", "client_id": "c1"}, headers=auth_headers(1))
+    assert posted.status_code == 201
+    assert (MessageMention.query.count(), MessageClientId.query.count(), FeedEntry.query.count()) == (1, 1, 2)
+
+    assert client.delete("/clubs/ABC123", headers=auth_headers(2)).status_code == 403
+    assert client.delete("/clubs/ABC123", headers=auth_headers(1)).status_code == 200
+    assert client.get("/clubs/ABC123", headers=auth_headers(1)).status_code == 404
+    assert client.delete("/clubs/ABC123", headers=auth_headers(1)).status_code == 404
+
+    worker = Worker(app)
+    assert worker.run_once() is True
+    assert worker.run_once() is False
+    job = Job.query.filter_by(idempotency_key="purge_club:1").one()
+    assert (job.status, job.result) == (Job.DONE, {"club_id": 1, "messages": 1})
+    for model in (Club, ClubMembership, Book, Message, MessageMention, MessageClientId, FeedEntry):
+        assert model.query.count() == 0, model.__name__
+
+    # rerunning the job (a crash after commit) finds nothing left to do
+    db.session.remove()
+    assert purge_club({"club_id": 1}) == {"club_id": 1, "messages": 0, "already_purged": True}
@@ -0,0 +1,29 @@
+# tests/test_compression.py
+import gzip
+import json
+import pytest
+from app.compression import STREAM_FLUSH_BYTES, brotli, stream_compressed
+
+ROWS = [json.dumps({"id": i, "content": f"message number {i}"}) + "\n" for i in range(20000)]
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    return brotli.decompress(data) if encoding == "br" else gzip.decompress(data)
+
+@pytest.mark.parametrize("encoding", [
+    "gzip",
+    pytest.param("br", marks=pytest.mark.skipif(brotli is None, reason="brotli not installed")),
+])
+def test_stream_compressed_flushes_every_flush_bytes(encoding):
+    pieces = list(stream_compressed(iter(ROWS), encoding))
+
+    raw = "".join(ROWS).encode()
+    assert decompress(b"".join(pieces), encoding) == raw
+    # one flush per STREAM_FLUSH_BYTES of input, not one per row
+    assert len(pieces) <= len(raw) // STREAM_FLUSH_BYTES + 2
+
+def test_stream_compressed_output_decodes_before_the_stream_ends():
+    pieces = list(stream_compressed(iter(ROWS), "gzip"))
+    decoder = gzip.zlib.decompressobj(16 + gzip.zlib.MAX_WBITS)
+    decoded = b"".join(decoder.decompress(piece) for piece in pieces[:-1])
+    assert len(decoded) >= len("".join(ROWS)) - STREAM_FLUSH_BYTES
+    assert "".join(ROWS).encode().startswith(decoded)
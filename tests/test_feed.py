@@ -0,0 +1,110 @@
+# tests/test_feed.py
+from datetime import datetime
+import pytest
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import Book, Club, ClubMembership, FeedEntry, User
+
+NOW = datetime(2025, 1, 1)
+
+@pytest.fixture
+def clubs(app, monkeypatch, primary_only):
+    """
+    with a fan-out limit of 2: club 1 (alice, bob; book 1) fans out,
+    club 2 (alice, bob, carol; books 2 and 3) is merged on read
+    """
+    monkeypatch.setitem(app.config, "FEED_FANOUT_MAX_MEMBERS", 2)
+    db.session.execute(insert(User), [
+        {"google_id": f"g{i}", "username": name, "created_at": NOW}
+        for i, name in enumerate(("alice", "bob", "carol"), 1)
+    ])
+    db.session.execute(insert(Club), [
+        {"unique_id": uid, "creator_id": 1, "name": uid, "created_at": NOW, "updated_at": NOW}
+        for uid in ("SMALL1", "LARGE2")
+    ])
+    db.session.execute(insert(ClubMembership), [
+        {"club_id": club_id, "user_id": user_id, "is_banned": False, "joined_at": NOW}
+        for club_id, user_ids in ((1, (1, 2)), (2, (1, 2, 3)))
+        for user_id in user_ids
+    ])
+    db.session.execute(insert(Book), [
+        {"club_id": club_id, "title": f"book {i}", "author": "a", "added_at": NOW}
+        for i, club_id in ((1, 1), (2, 2), (3, 2))
+    ])
+    db.session.commit()
+
+@pytest.fixture
+def post(client, auth_headers):
+    def send(book_id: int, content: str) -> int:
+        response = client.post(f"/books/{book_id}/messages", json={"content": content}, headers=auth_headers(1))
+        assert response.status_code == 201
+        return response.json["id"]
+    return send
+
+@pytest.fixture
+def feed(client, auth_headers):
+    def read(**params) -> list:
+        response = client.get("/feed", query_string=params, headers=auth_headers(1))
+        assert response.status_code == 200
+        return [m["content"] for m in response.json]
+    return read
+
+def fanout_from(club_id: int):
+    return db.session.get(Club, club_id, populate_existing=True).feed_fanout_from
+
+def timeline(user_id: int) -> list:
+    return sorted(e.message_id for e in FeedEntry.query.filter_by(user_id=user_id))
+
+def test_small_clubs_fan_out_and_large_ones_dont(clubs, post):
+    small = post(1, "s1")
+    post(2, "l1")
+    assert timeline(1) == timeline(2) == [small]
+    assert timeline(3) == []
+    assert (fanout_from(1), fanout_from(2)) == (small, None)
+
+def test_feed_merges_timelines_with_book_cursors(clubs, post, feed):
+    for book_id, content in ((1, "s1"), (2, "l1"), (3, "l2"), (1, "s2"), (2, "l3")):
+        post(book_id, content)
+    assert feed() == ["l3", "s2", "l2", "l1", "s1"]
+
+def test_feed_pages_across_both_sources(clubs, post, client, auth_headers):
+    contents = [f"{c}{i}" for i in range(4) for c in ("s", "l")]
+    ids = {post(1 if c.startswith("s") else 2 + i % 2, c): c for i, c in enumerate(contents)}
+
+    seen, before = [], None
+    while True:
+        params = {"limit": 3} if before is None else {"limit": 3, "before": before}
+        page = client.get("/feed", query_string=params, headers=auth_headers(1)).json
+        if not page:
+            break
+        seen.extend(m["id"] for m in page)
+        before = page[-1]["id"]
+    assert seen == sorted(ids, reverse=True)
+
+def test_a_club_that_shrinks_keeps_its_merged_messages(clubs, post, feed):
+    post(2, "large 1")
+    post(3, "large 2")
+    ClubMembership.query.filter_by(club_id=2, user_id=3).update({"is_banned": True})
+    db.session.commit()
+
+    small = post(2, "small 1")
+    assert fanout_from(2) == small
+    assert feed() == ["small 1", "large 2", "large 1"]
+    assert feed(limit=1) == ["small 1"]
+    assert feed(before=small) == ["large 2", "large 1"]
+
+def test_a_club_that_grows_keeps_its_timeline_messages(clubs, post, feed):
+    post(1, "small 1")
+    db.session.add(ClubMembership(club_id=1, user_id=3, is_banned=False))
+    db.session.commit()
+
+    large = post(1, "large 1")
+    assert fanout_from(1) is None
+    assert large not in timeline(1)
+    assert feed() == ["large 1", "small 1"]
+
+def test_starting_a_timeline_leaves_the_etag(clubs, post, client, auth_headers):
+    etag = client.get("/clubs/SMALL1", headers=auth_headers(1)).headers["ETag"]
+    post(1, "s1")
+    assert fanout_from(1) is not None
+    assert client.get("/clubs/SMALL1", headers=auth_headers(1)).headers["ETag"] == etag
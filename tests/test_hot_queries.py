@@ -0,0 +1,41 @@
+# tests/test_hot_queries.py
+from datetime import datetime
+import pytest
+from sqlalchemy import insert
+from app import hot_queries
+from app.extensions import db
+from app.models import Book, Club, ClubMembership, User
+
+NOW = datetime(2025, 1, 1)
+
+@pytest.fixture
+def club(app):
+    """ club ABC123 with book 1, member alice (1) and banned bob (2); club DEL456 is soft-deleted """
+    db.session.execute(insert(User), [
+        {"google_id": f"g{i}", "username": name, "created_at": NOW} for i, name in ((1, "alice"), (2, "bob"))
+    ])
+    db.session.execute(insert(Club), [
+        {"unique_id": uid, "creator_id": 1, "name": uid, "created_at": NOW, "updated_at": NOW, "deleted_at": deleted}
+        for uid, deleted in (("ABC123", None), ("DEL456", NOW))
+    ])
+    db.session.execute(insert(ClubMembership), [
+        {"club_id": 1, "user_id": user_id, "is_banned": banned, "joined_at": NOW}
+        for user_id, banned in ((1, False), (2, True))
+    ])
+    db.session.execute(insert(Book), [{"club_id": 1, "title": "one", "author": "a", "added_at": NOW}])
+    db.session.commit()
+
+def test_club_by_unique_id_skips_soft_deleted_clubs(club):
+    assert hot_queries.club_by_unique_id("ABC123") is Club.query.filter_by(unique_id="ABC123").one()
+    assert hot_queries.club_by_unique_id("DEL456") is None
+    assert hot_queries.club_by_unique_id("NOPE00") is None
+
+@pytest.mark.parametrize("user_id", [1, 2, 3])
+def test_memberships_match_the_query_api(club, user_id):
+    query = ClubMembership.query.filter_by(club_id=1, user_id=user_id)
+    assert hot_queries.membership(1, user_id) is query.first()
+    assert hot_queries.active_membership(1, user_id) is query.filter_by(is_banned=False).first()
+
+def test_book_by_id(club):
+    assert hot_queries.book_by_id(1) is db.session.get(Book, 1)
+    assert hot_queries.book_by_id(2) is None
@@ -0,0 +1,79 @@
+# tests/test_jobs.py
+from datetime import datetime
+import pytest
+from app.extensions import db
+from app.jobs.queue import HANDLERS, claim, enqueue
+from app.models import Job
+
+KEY = "noop:1"
+
+@pytest.fixture(autouse=True)
+def noop_handler(monkeypatch):
+    monkeypatch.setitem(HANDLERS, "noop", lambda payload: None)
+
+def finish(job_id: int, status: str) -> None:
+    job = db.session.get(Job, job_id)
+    job.status = status
+    job.attempts = job.max_attempts
+    job.run_at = datetime(2025, 1, 1)
+    job.finished_at = datetime(2025, 1, 1)
+    job.last_error = "boom" if status == Job.FAILED else None
+    job.locked_at = datetime(2025, 1, 1)
+    job.locked_by = "worker-1"
+    db.session.commit()
+
+def test_same_key_returns_the_queued_job(app):
+    first = enqueue("noop", {"n": 1}, idempotency_key=KEY)
+    db.session.commit()
+    second = enqueue("noop", {"n": 1}, idempotency_key=KEY)
+    assert second.id == first.id
+    assert Job.query.count() == 1
+
+def test_same_key_requeues_a_failed_job(app):
+    job_id = enqueue("noop", {"n": 1}, idempotency_key=KEY, max_attempts=3).id
+    db.session.commit()
+    finish(job_id, Job.FAILED)
+
+    requeued = enqueue("noop", {"n": 2}, idempotency_key=KEY, max_attempts=3)
+    db.session.commit()
+    assert requeued.id == job_id
+    assert (requeued.status, requeued.attempts, requeued.finished_at) == (Job.QUEUED, 0, None)
+    assert (requeued.last_error, requeued.locked_at, requeued.locked_by) == (None, None, None)
+    assert requeued.run_at > datetime(2025, 1, 1)
+    assert requeued.payload == {"n": 2}
+    assert Job.query.count() == 1
+
+def test_same_key_leaves_a_done_job_alone(app):
+    job_id = enqueue("noop", {"n": 1}, idempotency_key=KEY).id
+    db.session.commit()
+    finish(job_id, Job.DONE)
+
+    job = enqueue("noop", {"n": 1}, idempotency_key=KEY)
+    assert (job.id, job.status) == (job_id, Job.DONE)
+
+def lose_worker(job_id: int) -> None:
+    """ leave a claimed job running with a lock older than any timeout """
+    job = db.session.get(Job, job_id)
+    job.locked_at = datetime(2025, 1, 1)
+    db.session.commit()
+
+def test_stale_running_job_is_claimed_again(app):
+    job_id = enqueue("noop", {}, max_attempts=2).id
+    db.session.commit()
+    assert claim("worker-1", lock_timeout=60).attempts == 1
+    lose_worker(job_id)
+
+    reclaimed = claim("worker-2", lock_timeout=60)
+    assert (reclaimed.id, reclaimed.attempts, reclaimed.locked_by) == (job_id, 2, "worker-2")
+
+def test_stale_job_on_its_last_attempt_is_failed_not_rerun(app):
+    job_id = enqueue("noop", {}, max_attempts=1).id
+    db.session.commit()
+    assert claim("worker-1", lock_timeout=60).attempts == 1
+    lose_worker(job_id)
+
+    assert claim("worker-2", lock_timeout=60) is None
+    job = db.session.get(Job, job_id)
+    db.session.refresh(job)
+    assert (job.status, job.attempts, job.locked_by) == (Job.FAILED, 1, None)
+    assert job.last_error.startswith("lock expired")
@@ -0,0 +1,30 @@
+# tests/test_pool.py
+import pytest
+from sqlalchemy.pool import NullPool
+from app.pool import TimedQueuePool, build_engine_options
+
+PSYCOPG3 = "postgresql+psycopg://u:p@localhost/bindery"
+PSYCOPG2 = "postgresql+psycopg2://u:p@localhost/bindery"
+
+def test_sqlite_keeps_the_defaults():
+    assert build_engine_options({"SQLALCHEMY_DATABASE_URI": "sqlite:///x.db", "DB_PGBOUNCER": True}) == {}
+
+def test_pgbouncer_turns_off_prepared_statements_on_psycopg3():
+    options = build_engine_options({"SQLALCHEMY_DATABASE_URI": PSYCOPG3, "DB_PGBOUNCER": True})
+    assert options["poolclass"] is NullPool
+    assert options["connect_args"] == {"prepare_threshold": None}
+
+def test_pgbouncer_on_psycopg2_passes_no_connect_args():
+    options = build_engine_options({"SQLALCHEMY_DATABASE_URI": PSYCOPG2, "DB_PGBOUNCER": True})
+    assert options["poolclass"] is NullPool
+    assert "connect_args" not in options
+
+@pytest.mark.parametrize("config, threshold", [({}, 5), ({"DB_PREPARE_THRESHOLD": 2}, 2)])
+def test_psycopg3_prepares_after_the_threshold(config, threshold):
+    options = build_engine_options({"SQLALCHEMY_DATABASE_URI": PSYCOPG3, **config})
+    assert options["poolclass"] is TimedQueuePool
+    assert options["connect_args"]["prepare_threshold"] == threshold
+
+def test_psycopg2_sets_no_prepare_threshold():
+    options = build_engine_options({"SQLALCHEMY_DATABASE_URI": PSYCOPG2, "DB_STATEMENT_TIMEOUT_MS": 1000})
+    assert options["connect_args"] == {"options": "-c statement_timeout=1000"}
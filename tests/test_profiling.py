@@ -0,0 +1,44 @@
+# tests/test_profiling.py
+import logging
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import Club, ClubMembership, User
+from app.profiling import n_plus_one_suspects
+
+NOW = datetime(2025, 1, 1)
+
+def test_shape_over_the_threshold_is_a_suspect():
+    assert n_plus_one_suspects(Counter({"a": 6, "b": 1}), threshold=5) == [("a", 6)]
+
+def test_repeated_shapes_under_the_threshold_add_up():
+    suspects = n_plus_one_suspects(Counter({"a": 3, "b": 3, "c": 1}), threshold=5)
+    assert suspects == [("2 repeated statements: a; b", 6)]
+
+def test_statements_run_once_are_not_suspects():
+    assert n_plus_one_suspects(Counter({shape: 1 for shape in "abcdefgh"}), threshold=5) == []
+
+def test_club_members_endpoint_is_flagged(app, client, auth_headers, caplog, primary_only):
+    # profiling instruments the primary engine
+    members = app.config["N_PLUS_ONE_THRESHOLD"] + 2
+    db.session.execute(insert(User), [
+        {"google_id": f"g{i}", "username": f"user{i}", "created_at": NOW} for i in range(1, members + 1)
+    ])
+    db.session.execute(insert(Club), [{
+        "unique_id": "ABC123", "creator_id": 1, "name": "club", "created_at": NOW, "updated_at": NOW
+    }])
+    db.session.execute(insert(ClubMembership), [
+        {"club_id": 1, "user_id": i, "is_banned": False, "joined_at": NOW} for i in range(1, members + 1)
+    ])
+    db.session.commit()
+
+    with caplog.at_level(logging.WARNING, logger="bindery.n_plus_one"):
+        response = client.get("/clubs/ABC123/members", headers=auth_headers(1))
+    assert response.status_code == 200
+    assert len(response.json["members"]) == members
+
+    flagged = [r.getMessage() for r in caplog.records if r.name == "bindery.n_plus_one"]
+    assert len(flagged) == 1
+    assert flagged[0].startswith(f"possible N+1 in GET clubmembersresource: {members} executions of SELECT")
+    assert "FROM users WHERE users.id = " in flagged[0]
@@ -0,0 +1,27 @@
+# tests/test_recent_messages.py
+from datetime import datetime
+from app.messages.recent import RecentMessages, _Buffer, entry_size
+
+def message(id: int) -> dict:
+    return {"id": id, "user_id": 1, "content": f"message {id}", "created_at": datetime(2025, 1, 1)}
+
+def warmed(book_id: int, ids: list) -> RecentMessages:
+    """ a buffer holding `ids` for `book_id`, as if a warm had installed it """
+    recent = RecentMessages(per_book=10, max_bytes=1 << 20)
+    buf = _Buffer([message(i) for i in ids], complete=True)
+    recent._books[book_id] = buf
+    recent._grow(None, buf.size)
+    return recent
+
+def test_append_inserts_out_of_order_commits_in_id_order():
+    recent = warmed(1, [1, 3])
+    recent.append(1, message(2))
+    assert [m["id"] for m in recent.read(1)] == [1, 2, 3]
+
+def test_append_skips_a_message_the_warm_already_loaded():
+    recent = warmed(1, [1, 2, 3])
+    size = recent.size
+    recent.append(1, message(3))
+    recent.append(1, message(2))
+    assert [m["id"] for m in recent.read(1)] == [1, 2, 3]
+    assert recent.size == size == sum(entry_size(message(i)) for i in (1, 2, 3))
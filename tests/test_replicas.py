@@ -0,0 +1,105 @@
+# tests/test_replicas.py
+import json
+from datetime import datetime
+import pytest
+from flask import g
+from sqlalchemy import insert, select
+from app.extensions import db
+from app.models import Book, Club, ClubMembership, Message, User
+
+NOW = datetime(2025, 1, 1)
+
+def seed_club(bind, name: str) -> None:
+    """ user 1 in club 1, written straight to one (empty) database """
+    with bind.begin() as conn:
+        conn.execute(insert(User), [{"google_id": "g1", "username": "alice", "created_at": NOW}])
+        conn.execute(insert(Club), [{
+            "unique_id": "ABC123", "creator_id": 1, "name": name,
+            "created_at": NOW, "updated_at": NOW
+        }])
+        conn.execute(insert(ClubMembership), [{"club_id": 1, "user_id": 1, "is_banned": False, "joined_at": NOW}])
+
+@pytest.fixture
+def replicas(app):
+    replica_set = app.extensions["replicas"]
+    replica_set._healthy = list(replica_set.engines)
+    yield replica_set
+    replica_set._healthy = list(replica_set.engines)
+    replica_set._checked_at = 0.0
+
+@pytest.fixture
+def seeded(app, replica_engine):
+    with app.app_context():
+        seed_club(db.engine, "on primary")
+    seed_club(replica_engine, "on replica")
+
+def club_names(client, auth_headers) -> list:
+    response = client.get("/clubs", headers=auth_headers(1))
+    assert response.status_code == 200
+    return [club["name"] for club in response.json]
+
+def force_check(replicas, monkeypatch, lag) -> None:
+    """ make the next choose() re-check replicas, with `lag` standing in for ReplicaSet.lag """
+    monkeypatch.setattr(type(replicas), "lag", lambda self, engine: lag(engine))
+    monkeypatch.setattr(replicas, "check_interval", 0)
+    replicas._checked_at = 0.0
+
+def test_read_replica_handler_reads_from_replica(client, auth_headers, replicas, seeded):
+    assert club_names(client, auth_headers) == ["on replica"]
+
+def test_writes_go_to_primary(app, client, auth_headers, replicas, seeded, replica_engine):
+    response = client.post("/clubs", json={"name": "new club"}, headers=auth_headers(1))
+    assert response.status_code == 201
+
+    with app.app_context():
+        assert db.session.scalars(select(Club.name).where(Club.name == "new club")).all() == ["new club"]
+    with replica_engine.connect() as conn:
+        assert conn.execute(select(Club.name).where(Club.name == "new club")).all() == []
+
+def test_handlers_without_read_replica_use_primary(app, replicas, seeded, replica_engine):
+    with app.test_request_context():
+        assert db.session.get_bind(clause=select(Club)) is db.engine
+        assert db.session.scalars(select(Club.name)).all() == ["on primary"]
+
+def test_reads_after_a_write_are_pinned_to_primary(app, replicas, seeded, replica_engine):
+    with app.test_request_context():
+        g.read_replica = True
+        assert db.session.get_bind(clause=select(Club)) is replica_engine
+        assert db.session.scalars(select(Club.name)).all() == ["on replica"]
+
+        db.session.add(Club(creator_id=1, name="just written"))
+        db.session.flush()
+
+        assert db.session.get_bind(clause=select(Club)) is db.engine
+        assert sorted(db.session.scalars(select(Club.name))) == ["just written", "on primary"]
+        db.session.rollback()
+
+def test_unreachable_replica_falls_back_to_primary(client, auth_headers, replicas, seeded, monkeypatch):
+    def unreachable(engine):
+        raise ConnectionError("replica down")
+    force_check(replicas, monkeypatch, unreachable)
+
+    assert club_names(client, auth_headers) == ["on primary"]
+    assert replicas._healthy == []
+
+def test_lagging_replica_falls_back_to_primary(client, auth_headers, replicas, seeded, monkeypatch):
+    force_check(replicas, monkeypatch, lambda engine: replicas.max_lag + 1)
+
+    assert club_names(client, auth_headers) == ["on primary"]
+
+def test_replica_is_used_again_once_it_catches_up(client, auth_headers, replicas, seeded, monkeypatch):
+    force_check(replicas, monkeypatch, lambda engine: replicas.max_lag + 1)
+    assert club_names(client, auth_headers) == ["on primary"]
+
+    force_check(replicas, monkeypatch, lambda engine: 0.0)
+    assert club_names(client, auth_headers) == ["on replica"]
+
+def test_message_export_streams_from_replica(app, client, auth_headers, replicas, seeded, replica_engine):
+    for bind, content in ((db.engine, "on primary"), (replica_engine, "on replica")):
+        with bind.begin() as conn:
+            conn.execute(insert(Book), [{"club_id": 1, "title": "book", "author": "a", "added_at": NOW}])
+            conn.execute(insert(Message), [{"book_id": 1, "user_id": 1, "content": content, "created_at": NOW}])
+
+    response = client.get("/books/1/messages/export", headers=auth_headers(1))
+    assert response.status_code == 200
+    assert [json.loads(line)["content"] for line in response.get_data(as_text=True).splitlines()] == ["on replica"]
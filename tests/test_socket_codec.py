@@ -0,0 +1,19 @@
+# tests/test_socket_codec.py
+import pytest
+from app import socket_codec
+from app.socket_codec import socket_serializer
+from app.extensions import socketio
+
+def test_default_serializer_is_json(app):
+    assert socket_serializer(app) == "default"
+    assert socketio.server.packet_class.__name__ == "Packet"
+
+def test_msgpack_falls_back_to_json_without_msgpack(app, monkeypatch):
+    monkeypatch.setitem(app.config, "SOCKETIO_SERIALIZER", "msgpack")
+    monkeypatch.setattr(socket_codec, "msgpack", None)
+    assert socket_serializer(app) == "default"
+
+def test_unknown_serializer_is_rejected(app, monkeypatch):
+    monkeypatch.setitem(app.config, "SOCKETIO_SERIALIZER", "pickle")
+    with pytest.raises(ValueError):
+        socket_serializer(app)
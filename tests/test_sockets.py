@@ -0,0 +1,115 @@
+# tests/test_sockets.py
+import threading
+from datetime import datetime
+import pytest
+from sqlalchemy import insert, update
+from app.extensions import db
+from app.models import Book, Club, ClubMembership, User
+from app import sockets
+from app.sockets import evict_members, room_size
+
+NOW = datetime(2025, 1, 1)
+
+@pytest.fixture
+def clubs(app):
+    """ alice (1) is in club 1 (books 1, 2); bob (2) created club 2 (book 3) """
+    db.session.execute(insert(User), [
+        {"google_id": f"g{i}", "username": name, "created_at": NOW} for i, name in ((1, "alice"), (2, "bob"))
+    ])
+    db.session.execute(insert(Club), [
+        {"unique_id": uid, "creator_id": creator, "name": uid, "created_at": NOW, "updated_at": NOW}
+        for uid, creator in (("CLUB01", 1), ("CLUB02", 2))
+    ])
+    db.session.execute(insert(ClubMembership), [
+        {"club_id": club_id, "user_id": user_id, "is_banned": False, "joined_at": NOW}
+        for club_id, user_id in ((1, 1), (2, 2))
+    ])
+    db.session.execute(insert(Book), [
+        {"club_id": club_id, "title": f"book {i}", "author": "a", "added_at": NOW}
+        for i, club_id in ((1, 1), (2, 1), (3, 2))
+    ])
+    db.session.commit()
+
+def errors(sock) -> list:
+    return [e["args"][0] for e in sock.get_received() if e["name"] == "error"]
+
+def test_join_books_acks_a_status_per_book(clubs, socket_client):
+    alice = socket_client(1)
+    ack = alice.emit("join_books", {"token": alice.token, "book_ids": [2, 3, 404, 1, 2]}, callback=True)
+
+    assert ack == {"results": [
+        {"book_id": 2, "status": "joined"},
+        {"book_id": 3, "status": "forbidden"},
+        {"book_id": 404, "status": "not_found"},
+        {"book_id": 1, "status": "joined"},
+    ]}
+    assert (room_size("book_1"), room_size("book_2"), room_size("book_3")) == (1, 1, 0)
+
+    # joining again doesn't add the sid twice
+    alice.emit("join_books", {"token": alice.token, "book_ids": [1]}, callback=True)
+    assert room_size("book_1") == 1
+
+VALID = object()
+
+@pytest.mark.parametrize("data, code", [
+    ({"book_ids": [1]}, 400),
+    ({"token": VALID, "book_ids": []}, 400),
+    ({"token": VALID, "book_ids": 1}, 400),
+    ({"token": VALID, "book_ids": ["1"]}, 400),
+    ({"token": VALID, "book_ids": [True]}, 400),
+    ({"token": "not a jwt", "book_ids": [1]}, 401),
+])
+def test_join_books_rejects_bad_requests(clubs, socket_client, data, code):
+    alice = socket_client(1)
+    if data.get("token") is VALID:
+        data = {**data, "token": alice.token}
+    alice.emit("join_books", data)
+    assert [e["code"] for e in errors(alice)] == [code]
+    assert room_size("book_1") == 0
+
+@pytest.fixture
+def bob_in_club_1(clubs):
+    db.session.add(ClubMembership(club_id=1, user_id=2, is_banned=False))
+    db.session.commit()
+
+def test_ban_removes_the_socket_from_book_rooms(bob_in_club_1, socket_client, client, auth_headers):
+    bob = socket_client(2)
+    bob.emit("join_books", {"token": bob.token, "book_ids": [1, 2]}, callback=True)
+    assert (room_size("book_1"), room_size("book_2")) == (1, 1)
+
+    response = client.post("/clubs/CLUB01/ban", json={"user_id": 2}, headers=auth_headers(1))
+    assert response.status_code == 200
+
+    assert (room_size("book_1"), room_size("book_2")) == (0, 0)
+    left = [e["args"][0] for e in bob.get_received() if e["name"] == "left_room"]
+    assert sorted(left, key=lambda e: e["room"]) == [
+        {"room": "book_1", "reason": "banned"}, {"room": "book_2", "reason": "banned"}
+    ]
+
+def test_ban_during_a_join_still_evicts_it(app, bob_in_club_1, socket_client, monkeypatch):
+    """ a ban committed between the join's membership check and its registration """
+    bob = socket_client(2)
+    check = sockets.hot_queries.active_membership
+
+    def ban():
+        with app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(update(ClubMembership).where(ClubMembership.user_id == 2).values(is_banned=True))
+            evict_members(1, [2], reason="banned")
+
+    banning = threading.Thread(target=ban)
+
+    def check_then_ban(club_id, user_id):
+        membership = check(club_id, user_id)
+        banning.start()
+        banning.join(0.2)  # the eviction waits for the join to finish
+        return membership
+
+    monkeypatch.setattr(sockets.hot_queries, "active_membership", check_then_ban)
+    bob.emit("join_book", {"token": bob.token, "book_id": 1})
+    banning.join()
+
+    assert room_size("book_1") == 0
+    assert {"room": "book_1", "reason": "banned"} in [
+        e["args"][0] for e in bob.get_received() if e["name"] == "left_room"
+    ]
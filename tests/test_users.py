@@ -0,0 +1,92 @@
+# tests/test_users.py
+import threading
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import User
+from app.models.user import USERNAME_MAX_LENGTH, SUFFIX_LENGTH
+
+def usernames() -> dict:
+    return {u.google_id: u.username for u in User.query.order_by(User.id)}
+
+def is_suffixed_form(name: str, username: str) -> bool:
+    return User._is_suffixed(name, username)
+
+def test_first_login_creates_the_user(app):
+    user = User.create_or_update("g1", "alice")
+    assert (user.id, user.username) == (1, "alice")
+    assert usernames() == {"g1": "alice"}
+
+def test_username_collision_gets_a_suffix(app):
+    User.create_or_update("g1", "alice")
+    user = User.create_or_update("g2", "alice")
+    assert user.username != "alice" and is_suffixed_form(user.username, "alice")
+
+def test_long_colliding_username_stays_within_the_column(app):
+    name = "x" * (USERNAME_MAX_LENGTH + 10)
+    User.create_or_update("g1", name)
+    user = User.create_or_update("g2", name)
+    assert len(user.username) == USERNAME_MAX_LENGTH
+    assert user.username.startswith("x" * (USERNAME_MAX_LENGTH - SUFFIX_LENGTH) + "_")
+
+def test_second_login_updates_the_username(app):
+    first = User.create_or_update("g1", "alice")
+    second = User.create_or_update("g1", "alicia")
+    assert second.id == first.id
+    assert usernames() == {"g1": "alicia"}
+
+def test_suffixed_username_is_stable_across_logins(app):
+    User.create_or_update("g1", "alice")
+    suffixed = User.create_or_update("g2", "alice").username
+    assert User.create_or_update("g2", "alice").username == suffixed
+
+def test_freed_username_is_taken_back_at_next_login(app):
+    User.create_or_update("g1", "alice")
+    User.create_or_update("g2", "alice")
+    User.create_or_update("g1", "alicia")
+    assert User.create_or_update("g2", "alice").username == "alice"
+
+def test_concurrent_first_logins_create_one_user(app):
+    barrier = threading.Barrier(4)
+    ids, errors = [], []
+
+    def login():
+        with app.app_context():
+            try:
+                barrier.wait()
+                ids.append(User.create_or_update("g1", "alice").id)
+            except Exception as e:  # surfaced by the assert below
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=login) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(set(ids)) == 1
+    assert usernames() == {"g1": "alice"}
+
+def test_fallback_creates_updates_and_suffixes(app):
+    created = User._create_or_update_fallback("g1", "alice")
+    assert created.username == "alice"
+    assert User._create_or_update_fallback("g1", "alicia").id == created.id
+    assert usernames() == {"g1": "alicia"}
+
+    other = User._create_or_update_fallback("g2", "alicia")
+    assert is_suffixed_form(other.username, "alicia")
+    assert User._create_or_update_fallback("g2", "alicia").username == other.username
+
+def test_fallback_returns_the_winner_of_a_concurrent_first_login(app, monkeypatch):
+    add = db.session.add
+    def add_after_a_concurrent_login(obj):
+        with db.engine.begin() as conn:
+            conn.execute(insert(User), [{"google_id": "g1", "username": "alice"}])
+        add(obj)
+    monkeypatch.setattr(db.session, "add", add_after_a_concurrent_login)
+
+    user = User._create_or_update_fallback("g1", "alice")
+    assert user.google_id == "g1"
+    assert usernames() == {"g1": "alice"}
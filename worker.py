@@ -0,0 +1,10 @@
+# worker.py
+import logging
+from app import create_app
+from app.jobs.worker import Worker
+
+app = create_app()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    Worker(app).run()